@@ -0,0 +1,237 @@
+﻿"""
+Analysis Cache Module
+Memoizes analysis results keyed by a matrix fingerprint, with LRU eviction bounded by count and bytes
+"""
+import hashlib
+import inspect
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from functools import wraps
+
+from sparse_graph import CSRGraph, PackedUndirected
+
+# Default bound on the estimated size of everything in default_cache
+DEFAULT_CACHE_BYTES = 256 * 2**20
+
+class AnalysisCache:
+    """Thread-safe LRU cache with hit/miss counters
+    
+    At most maxsize entries are kept and, when max_bytes is set, at most
+    max_bytes bytes as estimated by estimate_size when each entry is stored.
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        size = estimate_size(value)
+        with self._lock:
+            self.total_bytes -= self._sizes.pop(key, 0)
+            self._entries.pop(key, None)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # would evict everything else and still not fit
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def resize(self, maxsize=None, max_bytes=None):
+        """Change the given bounds, evicting the oldest entries if needed"""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > max(self.maxsize, 0)
+                                 or self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            key, _ = self._entries.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize,
+                'bytes': self.total_bytes, 'max_bytes': self.max_bytes}
+
+# Shared by every cached function in graph_generator, graph_analyzer and graph_algorithms
+default_cache = AnalysisCache(max_bytes=DEFAULT_CACHE_BYTES)
+
+def estimate_size(value) -> int:
+    """Approximate bytes held by a cached value, including what it references
+    
+    Lists of scalars count one scalar per item (none for the shared small
+    ints of adjacency rows); objects count their attributes.
+    """
+    if isinstance(value, (list, tuple)):
+        size = sys.getsizeof(value)
+        if not value:
+            return size
+        first = value[0]
+        if isinstance(first, (int, float)):
+            if not (isinstance(first, int) and -5 <= first <= 256):
+                size += sys.getsizeof(first) * len(value)
+            return size
+        return size + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if hasattr(value, 'nbytes'):
+        # NumPy arrays: getsizeof leaves out the data of views
+        return max(sys.getsizeof(value), value.nbytes)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in vars(value).values())
+    return sys.getsizeof(value)
+
+_MISSING = object()
+
+def matrix_fingerprint(matrix) -> bytes:
+    """Cheap 128-bit digest of a dense matrix, CSRGraph or PackedUndirected"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(matrix, PackedUndirected):
+        digest.update(b"packed%d:" % matrix.n)
+        digest.update(matrix.data)
+        return digest.digest()
+    if isinstance(matrix, CSRGraph):
+        digest.update(b"csr%d:" % matrix.n)
+        digest.update(matrix.offsets.tobytes())
+        digest.update(matrix.indices.tobytes())
+        return digest.digest()
+
+    digest.update(b"dense%d:" % len(matrix))
+    for row in matrix:
+        digest.update(_encode_row(row))
+    return digest.digest()
+
+def _encode_row(row) -> bytes:
+    """Unambiguous encoding of one item of a list argument
+    
+    Every encoding is tagged and length-prefixed, so rows of different
+    lengths never run together. Rows of small ints (0/1 adjacency rows) hash
+    as raw bytes, other int rows (neighbour lists) as int64, plain ints
+    (degree sequences) as one int64; anything else falls back to repr.
+    """
+    if isinstance(row, int) and -2**63 <= row < 2**63:
+        return b"i" + row.to_bytes(8, 'little', signed=True)
+    try:
+        data = b"b" + bytes(row)
+    except (TypeError, ValueError, OverflowError):
+        try:
+            data = b"q" + array('q', row).tobytes()
+        except (TypeError, OverflowError):
+            data = b"r" + repr(row).encode()
+    return len(data).to_bytes(8, 'little') + data
+
+def cached(func):
+    """Route calls of func through default_cache
+
+    Matrix-like arguments are keyed by their fingerprint, everything else by
+    value. Results are copied on the way out, one level deep for lists and
+    dicts and through copy() for graphs, DAGs, indexes and arrays, so callers
+    may mutate them.
+    The undecorated function stays available as func.uncached, also through
+    decorators stacked on top (__wrapped__ only skips the outermost one).
+    """
+    signature = inspect.signature(func)
+    operation = f"{func.__module__}.{func.__qualname__}"
+
+    def cache_key(*args, **kwargs):
+        """Key of a call in default_cache, or None when a parameter is unhashable"""
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            key = (operation,) + tuple(_argument_key(value) for value in bound.arguments.values())
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = cache_key(*args, **kwargs)
+        if key is None:
+            return func(*args, **kwargs)  # unhashable parameter: skip the cache
+
+        result = default_cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = func(*args, **kwargs)
+            default_cache.put(key, result)
+        return _copy_result(result)
+
+    wrapper.cache_key = cache_key
+    wrapper.uncached = func
+    return wrapper
+
+def prime_cache(func, result, *args, **kwargs) -> bool:
+    """Store result as the cached value of func(*args, **kwargs)
+
+    Used for results computed elsewhere, e.g. loaded from a graph file.
+    Returns False when the call cannot be cached.
+    """
+    key = func.cache_key(*args, **kwargs)
+    if key is None:
+        return False
+    default_cache.put(key, result)
+    return True
+
+def cache_info() -> dict:
+    return default_cache.info()
+
+def clear_cache() -> None:
+    default_cache.clear()
+
+def set_cache_size(maxsize: int | None = None, max_bytes: int | None = None) -> None:
+    """Change the LRU bounds given (maxsize 0 disables caching)"""
+    default_cache.resize(maxsize, max_bytes)
+
+def _argument_key(value):
+    if isinstance(value, (list, CSRGraph, PackedUndirected)):
+        return ('matrix', matrix_fingerprint(value))
+    if isinstance(value, (set, frozenset)):
+        return ('set', tuple(sorted(value)))
+    return value
+
+def _copy_result(result):
+    if isinstance(result, list):
+        return [_copy_result(item) for item in result] if result and isinstance(result[0], (list, dict)) else result[:]
+    if isinstance(result, dict):
+        return {key: _copy_result(value) for key, value in result.items()}
+    if isinstance(result, tuple):
+        return tuple(_copy_result(item) for item in result)
+    # Graphs, DAGs, reachability indexes, NumPy arrays and sets
+    copy = getattr(result, 'copy', None)
+    return copy() if copy is not None else result
\ No newline at end of file
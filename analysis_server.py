@@ -0,0 +1,442 @@
+﻿"""
+Analysis Server Module
+Local HTTP/JSON API over the graph algorithms (asyncio, standard library only)
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from analysis_cache import DEFAULT_CACHE_BYTES, AnalysisCache, matrix_fingerprint
+from graph_analyzer import degree_summary
+from graph_generator import make_Aundir
+from graph_algorithms import condensation_dag, count_paths_totals, iter_paths_of_length
+from reachability import reachability_index
+from sparse_graph import CSRGraph
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+REQUEST_TIMEOUT = 30.0  # seconds to receive a complete request
+MAX_PATH_COUNT_LENGTH = 10_000
+# Paths per chunk of a streamed /paths response
+PATH_BATCH = 1000
+
+_REQUIRED = object()
+
+# Workers must not be forked from the server: they would inherit its open client
+# sockets and hold those connections open after the server closes them
+_CONTEXT = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                                       else 'spawn')
+
+class RequestError(Exception):
+    """A request the server refuses, answered with status and a JSON error message"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def parse_request(body: bytes) -> tuple[CSRGraph, dict]:
+    """Graph and remaining parameters of a JSON request body"""
+    payload = json.loads(body or b"{}")  # JSONDecodeError is a ValueError
+    if not isinstance(payload, dict):
+        raise ValueError("body must be a JSON object")
+    graph = parse_graph(payload)
+    return graph, {key: value for key, value in payload.items() if key not in ('matrix', 'n', 'edges')}
+
+def parse_graph(payload: dict) -> CSRGraph:
+    """Graph of a request: {"matrix": [[0, 1], [1, 0]]} or {"n": 2, "edges": [[0, 1], [1, 0]]}"""
+    if 'matrix' in payload:
+        matrix = payload['matrix']
+        if not isinstance(matrix, list) or any(not isinstance(row, list) or len(row) != len(matrix) for row in matrix):
+            raise ValueError("matrix must be a square list of lists")
+        if any(value not in (0, 1) for row in matrix for value in row):
+            raise ValueError("matrix entries must be 0 or 1")
+        return CSRGraph.from_matrix(matrix)
+    if 'edges' in payload:
+        n = _int_param(payload, 'n', minimum=0)
+        edges = payload['edges']
+        if not isinstance(edges, list) or any(not isinstance(edge, list) or len(edge) != 2 for edge in edges):
+            raise ValueError("edges must be a list of [source, target] pairs")
+        for edge in edges:
+            for vertex in edge:
+                _check_vertex(vertex, n)
+        return CSRGraph.from_edges(n, edges)
+    raise ValueError('request needs "matrix" or "n" and "edges"')
+
+def _int_param(payload: dict, name: str, default=_REQUIRED, minimum: int | None = None, maximum: int | None = None):
+    if name not in payload:
+        if default is _REQUIRED:
+            raise ValueError(f'"{name}" is required')
+        return default
+    value = payload[name]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f'"{name}" must be an integer')
+    if minimum is not None and value < minimum or maximum is not None and value > maximum:
+        raise ValueError(f'"{name}" is out of range')
+    return value
+
+def _check_vertex(vertex, n: int) -> int:
+    if not isinstance(vertex, int) or isinstance(vertex, bool) or not 0 <= vertex < n:
+        raise ValueError(f"vertex {vertex!r} is out of range")
+    return vertex
+
+def _degrees(graph: CSRGraph, params: dict) -> dict:
+    directed = params.get('directed', True)
+    if not isinstance(directed, bool):
+        raise ValueError('"directed" must be true or false')
+    # Undirected degrees count each edge at both ends, as for make_Aundir in the UI and batch runner
+    return degree_summary(graph if directed else make_Aundir(graph), is_directed=directed)
+
+def _scc(graph: CSRGraph, params: dict) -> dict:
+    dag = condensation_dag(graph)
+    return {
+        'components': dag.components(),
+        'labels': list(dag.labels),
+        'condensation_edges': [list(edge) for edge in dag.edges()],
+        'topological_order': list(dag.order),
+    }
+
+def _reachability(graph: CSRGraph, params: dict) -> dict:
+    index = reachability_index(graph)
+    result = {'num_components': len(index.rows), 'reachable_pairs': index.count_pairs()}
+    if 'pairs' in params:
+        pairs = params['pairs']
+        if not isinstance(pairs, list) or any(not isinstance(pair, list) or len(pair) != 2 for pair in pairs):
+            raise ValueError('"pairs" must be a list of [u, v] pairs')
+        result['reachable'] = index.reachable_many((_check_vertex(u, graph.n), _check_vertex(v, graph.n))
+                                                   for u, v in pairs)
+    if 'from' in params:
+        result['reachable_from'] = index.reachable_from(_check_vertex(params['from'], graph.n))
+    return result
+
+def _path_counts(graph: CSRGraph, params: dict) -> dict:
+    max_length = _int_param(params, 'max_length', minimum=1, maximum=MAX_PATH_COUNT_LENGTH)
+    min_length = _int_param(params, 'min_length', 1, minimum=1, maximum=max_length)
+    totals = count_paths_totals(graph, max_length, min_length)
+    return {'totals': {str(length): total for length, total in totals.items()}}
+
+# POST /<name> -> function(graph, params) returning a JSON-ready dict, run in a worker process
+OPERATIONS = {
+    'degrees': _degrees,
+    'scc': _scc,
+    'reachability': _reachability,
+    'path-counts': _path_counts,
+}
+
+def prepare_request(name: str, body: bytes) -> tuple[bytes, CSRGraph, dict]:
+    """Worker step before run_operation: parse a request body and derive its key
+    
+    The key digests the operation, the graph's matrix_fingerprint (as in the
+    analysis cache) and the other parameters with sorted keys, so requests
+    that differ only in whitespace, key order or graph form (matrix or
+    edges) share one key.
+    """
+    graph, params = parse_request(body)
+    digest = hashlib.blake2b(name.encode() + b"\0", digest_size=16)
+    digest.update(matrix_fingerprint(graph))
+    digest.update(json.dumps(params, sort_keys=True, separators=(',', ':')).encode())
+    return digest.digest(), graph, params
+
+def run_operation(name: str, graph: CSRGraph, params: dict) -> bytes:
+    """Worker entry point: run one operation on a parsed request and return the encoded JSON result"""
+    return json.dumps(OPERATIONS[name](graph, params), ensure_ascii=False).encode()
+
+def _stream_paths(connection, body: bytes) -> None:
+    """Worker process of a /paths stream
+    
+    Sends b"ok" once the request is parsed (b"error:" and a message for an
+    invalid request, b"failed:" for any other failure), then NDJSON batches,
+    then an empty message. The pipe has a bounded
+    buffer, so a slow client blocks the enumeration instead of letting paths
+    pile up in memory.
+    """
+    try:
+        try:
+            graph, params = parse_request(body)
+            length = _int_param(params, 'length', minimum=0)
+            max_count = _int_param(params, 'max_count', None, minimum=0)
+            targets = params.get('targets')
+            if targets is not None:
+                if not isinstance(targets, list):
+                    raise ValueError('"targets" must be a list of vertices')
+                targets = [_check_vertex(vertex, graph.n) for vertex in targets]
+        except (ValueError, RecursionError) as error:  # RecursionError: JSON nested too deeply
+            connection.send_bytes(b"error:" + str(error).encode())
+            return
+        except Exception as error:
+            connection.send_bytes(b"failed:" + f"{type(error).__name__}: {error}".encode())
+            return
+        connection.send_bytes(b"ok")
+        batch = []
+        for path in iter_paths_of_length(graph, length, max_count, targets):
+            batch.append(json.dumps(path))
+            if len(batch) == PATH_BATCH:
+                connection.send_bytes(("\n".join(batch) + "\n").encode())
+                batch = []
+        if batch:
+            connection.send_bytes(("\n".join(batch) + "\n").encode())
+        connection.send_bytes(b"")
+    except (BrokenPipeError, EOFError):
+        pass  # the client went away and the server closed its end
+    finally:
+        connection.close()
+
+class AnalysisServer:
+    """HTTP/JSON front end that runs analyses in a process pool
+
+    Requests are keyed by operation, graph fingerprint and normalised
+    parameters (prepare_request). Parsing and validation happen in the
+    workers, so the event loop never touches a graph; a repeated raw body
+    finds its key without parsing again. Equivalent requests share one
+    computation while it runs, and finished results are kept in an LRU
+    cache as encoded JSON. At most
+    max_jobs computations, path streams included, run at once; further
+    requests wait for a free slot. At most max_connections connections are
+    served at once.
+    """
+
+    def __init__(self, workers: int | None = None, max_jobs: int | None = None, max_connections: int = 64,
+                 cache_size: int = 256, max_body_bytes: int = MAX_BODY_BYTES,
+                 cache_bytes: int | None = DEFAULT_CACHE_BYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs or self.workers
+        self.max_body_bytes = max_body_bytes
+        self.cache = AnalysisCache(cache_size, cache_bytes)
+        # (operation, raw body digest) -> key from prepare_request
+        self._keys = AnalysisCache(cache_size)
+        self.pool = None
+        self.stats = {'requests': 0, 'computed': 0, 'coalesced': 0, 'streams': 0, 'errors': 0}
+        self._max_connections = max_connections
+        self._inflight = {}
+        self._jobs = None
+        self._connections = None
+        self._server = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """Start the pool and listen; returns the asyncio server"""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_CONTEXT)
+        self._jobs = asyncio.Semaphore(self.max_jobs)
+        self._connections = asyncio.Semaphore(self._max_connections)
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def serve_forever(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def analyze(self, operation: str, body: bytes) -> bytes:
+        """Encoded result of operation, from the cache, a running equivalent request or the pool"""
+        raw_key = (operation, hashlib.blake2b(body, digest_size=16).digest())
+        key = self._keys.get(raw_key)
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+        # Identical bodies are parsed once, equivalent ones computed once
+        key, graph, params = await self._shared(raw_key, lambda: self._prepare(raw_key, operation, body), False)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        return await self._shared(key, lambda: self._compute(key, operation, graph, params), True)
+
+    def _shared(self, key, start, count: bool):
+        """Wait for the running task of key, started with start() when there is none"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(start())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        elif count:
+            self.stats['coalesced'] += 1
+        # Shielded: a client that disconnects must not cancel the work others wait for
+        return asyncio.shield(future)
+
+    async def _prepare(self, raw_key, operation, body):
+        async with self._jobs:
+            prepared = await asyncio.get_running_loop().run_in_executor(self.pool, prepare_request, operation, body)
+        self._keys.put(raw_key, prepared[0])
+        return prepared
+
+    async def _compute(self, key, operation, graph, params) -> bytes:
+        async with self._jobs:
+            self.stats['computed'] += 1
+            result = await asyncio.get_running_loop().run_in_executor(self.pool, run_operation, operation,
+                                                                      graph, params)
+        self.cache.put(key, result)
+        return result
+
+    async def _handle(self, reader, writer):
+        """Serve one request; anything that fails before a response was written is answered with a JSON error"""
+        async with self._connections:
+            try:
+                try:
+                    method, path, body = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+                    self.stats['requests'] += 1
+                    await self._route(method, path, body, writer)
+                except RequestError as error:
+                    self.stats['errors'] += 1
+                    await self._send_json(writer, error.status, {'error': error.message})
+                except asyncio.TimeoutError:
+                    await self._send_json(writer, HTTPStatus.REQUEST_TIMEOUT, {'error': "request timed out"})
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    pass
+                except Exception as error:
+                    self.stats['errors'] += 1
+                    await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                          {'error': f"{type(error).__name__}: {error}"})
+            except ConnectionError:
+                pass  # the client left before the error response
+            finally:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except ConnectionError:
+                    pass
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "headers too large")
+        if len(head) > MAX_HEADER_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "headers too large")
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if 'transfer-encoding' in headers:
+            raise RequestError(HTTPStatus.LENGTH_REQUIRED, "chunked request bodies are not supported")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length < 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body larger than {self.max_body_bytes} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), urlsplit(target).path, body
+
+    async def _route(self, method, path, body, writer):
+        name = path.strip("/")
+        if method == "GET" and name == "health":
+            return await self._send_json(writer, HTTPStatus.OK, {'status': "ok"})
+        if method == "GET" and name == "stats":
+            return await self._send_json(writer, HTTPStatus.OK, {
+                **self.stats, 'inflight': len(self._inflight), 'cache': self.cache.info(),
+                'workers': self.workers, 'max_jobs': self.max_jobs})
+        if name not in OPERATIONS and name != "paths":
+            raise RequestError(HTTPStatus.NOT_FOUND, f"unknown endpoint /{name}")
+        if method != "POST":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST with a JSON body")
+
+        if name == "paths":
+            return await self._stream(writer, body)
+        try:
+            result = await self.analyze(name, body)
+        except (ValueError, RecursionError) as error:  # malformed or too deeply nested request, raised in the worker
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(error))
+        except BrokenProcessPool:
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "worker pool is broken")
+        except Exception as error:
+            raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(error).__name__}: {error}")
+        await self._send(writer, HTTPStatus.OK, result)
+
+    async def _stream(self, writer, body: bytes):
+        """Answer /paths with chunked NDJSON, one path (a list of vertices) per line, lexicographic order"""
+        loop = asyncio.get_running_loop()
+        async with self._jobs:
+            self.stats['streams'] += 1
+            receive, send = _CONTEXT.Pipe(duplex=False)
+            process = _CONTEXT.Process(target=_stream_paths, args=(send, body), daemon=True)
+            process.start()
+            send.close()
+            try:
+                try:
+                    status = await loop.run_in_executor(None, receive.recv_bytes)
+                except EOFError:
+                    raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, "path worker failed")
+                if status.startswith(b"error:"):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, status[len(b"error:"):].decode())
+                if status.startswith(b"failed:"):
+                    raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, status[len(b"failed:"):].decode())
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                             b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+                try:
+                    while True:
+                        chunk = await loop.run_in_executor(None, receive.recv_bytes)
+                        if not chunk:
+                            break
+                        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        await writer.drain()
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+                except ConnectionError:
+                    raise
+                except Exception:
+                    # The status line is out, so an error body is impossible: close without the
+                    # last chunk and the client sees a cut stream (also when the worker dies: EOFError)
+                    return
+            finally:
+                receive.close()
+                if process.is_alive():
+                    process.terminate()
+                await loop.run_in_executor(None, process.join)
+
+    async def _send_json(self, writer, status: HTTPStatus, data: dict):
+        await self._send(writer, status, json.dumps(data, ensure_ascii=False).encode())
+
+    async def _send(self, writer, status: HTTPStatus, body: bytes):
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON graph analysis service")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--max-jobs', type=int, help='computations and path streams running at once (default: workers)')
+    parser.add_argument('--max-connections', type=int, default=64, help='connections served at once')
+    parser.add_argument('--cache-size', type=int, default=256, help='cached results (0 disables the cache)')
+    parser.add_argument('--cache-bytes', type=int, default=DEFAULT_CACHE_BYTES, help='largest total size of cached results')
+    parser.add_argument('--max-body-bytes', type=int, default=MAX_BODY_BYTES, help='largest accepted request body')
+    args = parser.parse_args(argv)
+
+    server = AnalysisServer(args.workers, args.max_jobs, args.max_connections, args.cache_size, args.max_body_bytes,
+                            args.cache_bytes)
+    print(f"Serving graph analysis on http://{args.host}:{args.port} with {server.workers} workers", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,287 @@
+﻿"""
+Batch Runner Module
+Headless command-line analysis of many (n, k, seed) combinations in parallel
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+
+import config
+import profiler
+from analysis_cache import set_cache_size
+from graph_generator import generate_Adir, generate_edges_family, make_Aundir
+from graph_analyzer import degree_summary
+from graph_algorithms import (find_strongly_connected_components, create_condensation_graph,
+                              transitive_closure_condensed, condensation_dag)
+from graph_io import load_graph, save_graph
+from reachability import reachability_index
+from sparse_graph import CSRGraph
+
+# Columns of the comparison table: (result field, header)
+COMPARISON_COLUMNS = [
+    ('edges', 'Дуг'),
+    ('undirected_edges', 'Ребер'),
+    ('directed_hanging', 'Вис.'),
+    ('directed_isolated', 'Ізол.'),
+    ('num_components', 'КСЗ'),
+    ('largest_component', 'Найб. КСЗ'),
+    ('condensation_edges', 'Дуг конд.'),
+    ('reachable_pairs', 'Досяжних пар'),
+]
+
+def analyze_job(job: tuple[int, float, int], full: bool = False, save_dir: str | None = None) -> dict:
+    """Generate one graph pair and run degree, SCC and closure analysis on it
+    
+    With save_dir the directed graph and its derived results are also
+    written there as a binary graph file (see graph_io).
+    """
+    n, k, seed = job
+    started = time.perf_counter()
+
+    Adir = generate_Adir(n, k, seed)
+    components = find_strongly_connected_components(Adir)
+    condensation = create_condensation_graph(Adir, components)
+    reachable_pairs = reachability_index(Adir).count_pairs()
+
+    result = {'n': n, 'k': k, 'seed': seed}
+    result.update(_summarize(Adir, components, condensation, reachable_pairs, full))
+    if save_dir is not None:
+        # The file format stores the full closure rows
+        result['file'] = os.path.join(save_dir, f"graph_n{n}_k{k:g}_s{seed}.grph")
+        save_graph(result['file'], Adir, transitive_closure_condensed(Adir), components, condensation)
+    result['seconds'] = round(time.perf_counter() - started, 6)
+    return result
+
+def analyze_file(path: str, full: bool = False) -> dict:
+    """Run the same analysis on a saved graph, reusing any derived results stored with it"""
+    started = time.perf_counter()
+    with load_graph(path) as graph_file:
+        graph = graph_file.graph
+        if graph_file.labels is not None:
+            components = graph_file.components()
+        else:
+            components = find_strongly_connected_components(graph)
+        if graph_file.condensation is not None:
+            condensation = graph_file.condensation.to_matrix()
+        else:
+            condensation = create_condensation_graph(graph, components)
+        if 'closure' in graph_file:
+            reachable_pairs = sum(row.bit_count() for row in graph_file.closure())
+        else:
+            reachable_pairs = reachability_index(graph).count_pairs()
+
+        result = {'file': path, 'n': graph_file.n}
+        result.update(_summarize(graph, components, condensation, reachable_pairs, full))
+    result['seconds'] = round(time.perf_counter() - started, 6)
+    return result
+
+def analyze_graph(graph: list[list[int]] | CSRGraph, full: bool = False) -> dict:
+    """Degree, SCC and closure analysis of a graph that is already in memory"""
+    started = time.perf_counter()
+    dag = condensation_dag(graph)
+    result = _summarize(graph, dag.components(), dag.graph, reachability_index(graph).count_pairs(), full)
+    result['seconds'] = round(time.perf_counter() - started, 6)
+    return result
+
+def compare_k_values(n: int, k_values: list[float], seed: int, workers: int | None = None,
+                     mode: str = "legacy", full: bool = False) -> list[dict]:
+    """Analyze the graphs of one seed at several k in one parallel pass
+    
+    The graphs come from a single shared random draw (generate_edges_family),
+    so they differ only by k; each is sent to the pool in CSR form. Returns
+    one result per k, in the order given.
+    """
+    started = time.perf_counter()
+    graphs = generate_edges_family(n, k_values, seed, mode)
+    generated = time.perf_counter() - started
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(None,)) as executor:
+        analyses = list(executor.map(partial(analyze_graph, full=full), graphs))
+    results = []
+    for k, analysis in zip(k_values, analyses):
+        result = {'n': n, 'k': k, 'seed': seed, 'density': analysis['edges'] / (n * n) if n else 0.0}
+        result.update(analysis)
+        results.append(result)
+    for result in results:
+        # The shared draw is charged to every graph, as analyze_job charges its own generation
+        result['seconds'] = round(result['seconds'] + generated, 6)
+    return results
+
+def format_comparison(results: list[dict], columns=COMPARISON_COLUMNS) -> str:
+    """Plain text table of compare_k_values results, one row per k"""
+    if not results:
+        return "Немає результатів\n"
+    # Vertex lists (hanging, isolated) are shown as counts
+    cells = [[str(len(result[field]) if isinstance(result[field], list) else result[field]) for field, _ in columns]
+             for result in results]
+    widths = [max(len(header), *(len(row[column]) for row in cells)) for column, (_, header) in enumerate(columns)]
+    lines = [f"{'k':>8} {'Щільн.':>7} " + " ".join(f"{header:>{width}}" for (_, header), width in zip(columns, widths))]
+    for result, row in zip(results, cells):
+        lines.append(f"{result['k']:>8.4f} {result['density']:>7.3f} "
+                     + " ".join(f"{cell:>{width}}" for cell, width in zip(row, widths)))
+    return "\n".join(lines) + "\n"
+
+def _summarize(Adir, components, condensation, reachable_pairs, full) -> dict:
+    """Result fields shared by generated and loaded graphs"""
+    Aundir = make_Aundir(Adir)
+    dir_degrees = degree_summary(Adir, is_directed=True)
+    undir_degrees = degree_summary(Aundir, is_directed=False)
+
+    result = {
+        'edges': sum(dir_degrees['out_degrees']),
+        'undirected_edges': sum(undir_degrees['degrees']) // 2,  # self-loops count 2 in degrees
+        'directed_regular': dir_degrees['regular'],
+        'directed_regular_degree': dir_degrees['regular_degree'],
+        'undirected_regular': undir_degrees['regular'],
+        'undirected_regular_degree': undir_degrees['regular_degree'],
+        'directed_hanging': dir_degrees['hanging'],
+        'directed_isolated': dir_degrees['isolated'],
+        'undirected_hanging': undir_degrees['hanging'],
+        'undirected_isolated': undir_degrees['isolated'],
+        'num_components': len(components),
+        'largest_component': max(map(len, components), default=0),
+        'condensation_edges': (condensation.num_edges if isinstance(condensation, CSRGraph)
+                               else sum(map(sum, condensation))),
+        'reachable_pairs': reachable_pairs,
+    }
+    if full:
+        result.update({
+            'in_degrees': dir_degrees['in_degrees'],
+            'out_degrees': dir_degrees['out_degrees'],
+            'undirected_degrees': undir_degrees['degrees'],
+            'components': components,
+            'condensation': condensation.to_matrix() if isinstance(condensation, CSRGraph) else condensation,
+        })
+    return result
+
+def parse_int_values(spec: str) -> list[int]:
+    """Parse "13", "10,20,30" or "start:stop[:step]" (stop inclusive) into ints"""
+    values = []
+    for part in spec.split(','):
+        if ':' in part:
+            bounds = [int(x) for x in part.split(':')]
+            start, stop = bounds[0], bounds[1]
+            step = bounds[2] if len(bounds) > 2 else 1
+            values.extend(range(start, stop + 1, step))
+        else:
+            values.append(int(part))
+    return values
+
+def parse_k_values(spec: str) -> list[float]:
+    """Parse comma separated k coefficients or "start:stop:step" ranges (stop inclusive)
+    
+    K1/K2 refer to config values.
+    """
+    named = {'K1': config.K1, 'K2': config.K2}
+    values = []
+    for part in spec.split(','):
+        if ':' in part:
+            start, stop, step = (float(x) for x in part.split(':'))
+            # Multiples of step, so rounding errors do not accumulate or drop the stop value
+            count = int(math.floor((stop - start) / step + 1e-9)) + 1
+            values.extend(round(start + index * step, 12) for index in range(max(count, 0)))
+        else:
+            values.append(named[part.upper()] if part.upper() in named else float(part))
+    return values
+
+def run_batch(jobs, output, workers=None, chunksize=1, full=False, save_dir=None, profile=None) -> int:
+    """Analyze jobs across a process pool, writing one JSON line per job in job order
+    
+    A job is an (n, k, seed) tuple to generate or the path of a saved graph file.
+    profile is None, "time" or "memory": workers then record profiler timings
+    (and allocations), which are merged into this process's profiler.
+    """
+    if jobs and isinstance(jobs[0], str):
+        worker = partial(analyze_file, full=full)
+    else:
+        worker = partial(analyze_job, full=full, save_dir=save_dir)
+    if profile:
+        worker = partial(_profiled_job, worker)
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(profile,)) as executor:
+        for result in executor.map(worker, jobs, chunksize=chunksize):
+            if profile:
+                result, stats = result
+                profiler.merge(stats)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    output.flush()
+    return count
+
+def _init_worker(profile):
+    # Every job is a different graph, so the per-process result cache would only cost memory
+    set_cache_size(0)
+    if profile:
+        profiler.enable(memory=profile == "memory")
+
+def _profiled_job(worker, job):
+    """Run one job and return its result with the profiler records it produced"""
+    profiler.reset()
+    result = worker(job)
+    return result, profiler.report()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch graph analysis (JSON Lines output)")
+    parser.add_argument('--n', default=str(config.N), help='vertex counts: "13", "10,20" or "10:100:10"')
+    parser.add_argument('--k', default='K1,K2', help='k coefficients, e.g. "0.65,0.7" or "K1,K2"')
+    parser.add_argument('--seeds', default=str(config.SEED), help='seeds, same syntax as --n')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--chunksize', type=int, default=0,
+                        help='jobs per task sent to a worker (0 = pick automatically)')
+    parser.add_argument('--output', default='-', help='output .jsonl file ("-" for stdout)')
+    parser.add_argument('--full', action='store_true', help='include per-vertex degrees and components')
+    parser.add_argument('--input', nargs='+', metavar='FILE',
+                        help='analyze saved graph files instead of generating (--n/--k/--seeds are ignored)')
+    parser.add_argument('--save', metavar='DIR', help='also save each generated graph with its results to DIR')
+    parser.add_argument('--compare', action='store_true',
+                        help='compare all --k values for one n and seed from a shared random draw (table output)')
+    parser.add_argument('--mode', choices=('legacy', 'numpy'), default='legacy',
+                        help='random stream of --compare (legacy matches the GUI graphs)')
+    parser.add_argument('--profile', metavar='FILE', help='write per-function call counts and timings as JSON')
+    parser.add_argument('--profile-memory', action='store_true', help='with --profile, also record the peak allocation of each call')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return _compare_main(parser, args)
+    if args.input:
+        jobs = args.input
+    else:
+        jobs = list(product(parse_int_values(args.n), parse_k_values(args.k), parse_int_values(args.seeds)))
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+    workers = max(1, args.workers or 1)
+    # A few chunks per worker keeps all cores busy while amortising IPC
+    chunksize = args.chunksize or max(1, len(jobs) // (workers * 4))
+
+    profile = ("memory" if args.profile_memory else "time") if args.profile else None
+    started = time.perf_counter()
+    if args.output == '-':
+        count = run_batch(jobs, sys.stdout, workers, chunksize, args.full, args.save, profile)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            count = run_batch(jobs, output, workers, chunksize, args.full, args.save, profile)
+    print(f"Analyzed {count} graphs in {time.perf_counter() - started:.2f}s "
+          f"with {workers} workers", file=sys.stderr)
+    if args.profile:
+        profiler.dump(args.profile, memory_traced=args.profile_memory)
+
+def _compare_main(parser, args):
+    sizes, seeds = parse_int_values(args.n), parse_int_values(args.seeds)
+    if len(sizes) != 1 or len(seeds) != 1 or args.input:
+        parser.error("--compare takes one --n and one --seeds value and no --input")
+    results = compare_k_values(sizes[0], parse_k_values(args.k), seeds[0], max(1, args.workers or 1),
+                               args.mode, args.full)
+    if args.output == '-':
+        sys.stdout.write(format_comparison(results))
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            for result in results:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
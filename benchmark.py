@@ -0,0 +1,247 @@
+﻿"""
+Benchmark Module
+Times the hot paths over a grid of graph sizes and densities, with JSON output and regression comparison
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:  # only reported in the metadata
+    np = None
+
+import config
+from analysis_cache import default_cache, set_cache_size
+from batch_runner import parse_int_values, parse_k_values
+from graph_generator import generate_Adir, generate_edges, make_Aundir, matrix_multiply, matrix_power, calculate_grid_size
+from graph_algorithms import (find_paths_of_length, transitive_closure, strong_connectivity_matrix,
+                              find_strongly_connected_components, create_condensation_graph)
+from graph_visualizer import GraphVisualizer
+
+# Routed edges per find_best_path measurement (a deterministic sample of the graph's edges)
+ROUTED_EDGES = 200
+
+def _route_edges(positions, edges):
+    visualizer = GraphVisualizer(None)
+    for i, j in edges:
+        visualizer.find_best_path(positions[i], positions[j], positions)
+
+# name -> (input kind, expected exponent in n, dense n×n output, function of the prepared input)
+# The exponent only predicts the first skip before two sizes have been measured.
+BENCHMARKS = {
+    'generate_Adir': ('params', 2, True, lambda graph: generate_Adir(*graph)),
+    'make_Aundir': ('dense', 2, True, make_Aundir),
+    'matrix_multiply': ('dense', 3, True, lambda A: matrix_multiply(A, A)),
+    'matrix_power': ('dense', 3, True, lambda A: matrix_power(A, 3)),
+    'find_paths_of_length': ('csr', 3, False, lambda G: find_paths_of_length(G, 2)),
+    'transitive_closure': ('csr', 2, True, transitive_closure),
+    'strong_connectivity_matrix': ('csr', 2, True, strong_connectivity_matrix),
+    'find_strongly_connected_components': ('csr', 2, False, find_strongly_connected_components),
+    'create_condensation_graph': ('csr+components', 2, False, lambda args: create_condensation_graph(*args)),
+    'find_best_path': ('routes', 1, False, lambda args: _route_edges(*args)),
+}
+
+DEFAULT_SIZES = "13,100,1000,10000"
+# Dense inputs above this many cells (n = 5000) would need gigabytes of list memory
+MAX_DENSE_CELLS = 25_000_000
+# Inputs are drawn with the fast NumPy generator when available; the graphs differ
+# from the legacy stream but have the same density
+INPUT_MODE = "numpy" if np is not None else "legacy"
+
+def prepare_input(kind: str, n: int, k: float, seed: int, inputs: dict):
+    """Build (and memoize in inputs) the argument a benchmark of the given kind receives"""
+    if kind in inputs:
+        return inputs[kind]
+    if kind == 'params':
+        value = (n, k, seed)
+    elif kind == 'dense':
+        value = generate_Adir(n, k, seed, INPUT_MODE)
+    elif kind == 'csr':
+        # Same graph as 'dense', built without the dense matrix
+        value = generate_edges(n, k, seed, INPUT_MODE)
+    elif kind == 'csr+components':
+        graph = prepare_input('csr', n, k, seed, inputs)
+        value = (graph, find_strongly_connected_components(graph))
+    elif kind == 'routes':
+        graph = prepare_input('csr', n, k, seed, inputs)
+        visualizer = GraphVisualizer(None)
+        visualizer.calculate_positions(n, *calculate_grid_size(n))
+        edges = [(i, j) for i, j in graph.edges() if i != j]
+        sample = random.Random(seed).sample(edges, min(ROUTED_EDGES, len(edges)))
+        value = (visualizer.positions, sample)
+    else:
+        raise ValueError(f"Unknown benchmark input: {kind}")
+    inputs[kind] = value
+    return value
+
+def measure(func, argument, repeats: int = 3, memory: bool = True) -> dict:
+    """Best-of-repeats wall time plus tracemalloc peak of one extra run"""
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        func(argument)
+        times.append(time.perf_counter() - started)
+    result = {'seconds': min(times), 'mean_seconds': sum(times) / len(times), 'repeats': repeats}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(argument)
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def scaling_exponent(points: list[tuple[int, float]]) -> float | None:
+    """Least-squares slope of log(time) over log(n): time ≈ c·n^exponent"""
+    points = [(math.log(n), math.log(seconds)) for n, seconds in points if n > 0 and seconds > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+def _predict(points, order, n):
+    """Expected time at n, extrapolated with the larger of the fitted and the expected exponent
+
+    Small sizes are dominated by constant overhead and fit too flat a curve,
+    so the expected order keeps the prediction from being optimistic.
+    """
+    exponent = max(scaling_exponent(points[-3:]) or 0.0, order)
+    last_n, last_seconds = points[-1]
+    return last_seconds * (n / last_n) ** exponent
+
+def run_benchmarks(names, sizes, k_values, seed=config.SEED, repeats=3, memory=True,
+                   max_seconds=10.0, max_dense_cells=MAX_DENSE_CELLS, log=None) -> dict:
+    """Run every benchmark for every (k, n); returns the JSON-ready report
+
+    A measurement predicted to take longer than max_seconds (extrapolating
+    from the smaller sizes), or needing a dense input above max_dense_cells,
+    is recorded as skipped instead of run.
+    """
+    previous_cache_size = default_cache.maxsize
+    set_cache_size(0)  # repeated calls must not be served from the analysis cache
+    results = []
+    try:
+        for k in k_values:
+            timings = {name: [] for name in names}
+            for n in sorted(sizes):
+                inputs = {}
+                for name in names:
+                    kind, order, dense_output, func = BENCHMARKS[name]
+                    entry = {'benchmark': name, 'n': n, 'k': k,
+                             'density': max(0.0, 1.0 - 1.0 / (2.0 * k)) if k else 0.0}
+                    points = timings[name]
+                    if kind in ('dense', 'params') and n * n > max_dense_cells:
+                        entry['skipped'] = f"dense {n}×{n} input above {max_dense_cells} cells"
+                    elif dense_output and n * n > max_dense_cells:
+                        entry['skipped'] = f"dense {n}×{n} output above {max_dense_cells} cells"
+                    elif points and _predict(points, order, n) > max_seconds:
+                        entry['skipped'] = f"predicted {_predict(points, order, n):.1f}s > {max_seconds}s"
+                    else:
+                        argument = prepare_input(kind, n, k, seed, inputs)
+                        entry.update(measure(func, argument, repeats, memory))
+                        points.append((n, entry['seconds']))
+                    results.append(entry)
+                    if log is not None:
+                        print(_format_entry(entry), file=log, flush=True)
+    finally:
+        set_cache_size(previous_cache_size)
+
+    exponents = {}
+    for name in names:
+        for k in k_values:
+            points = [(entry['n'], entry['seconds']) for entry in results
+                      if entry['benchmark'] == name and entry['k'] == k and 'seconds' in entry]
+            exponents.setdefault(name, {})[f"{k:.4f}"] = scaling_exponent(points)
+    return {'meta': _metadata(seed, repeats), 'results': results, 'exponents': exponents}
+
+def compare_reports(baseline: dict, current: dict, threshold: float = 1.25) -> list[dict]:
+    """Pair up measurements of two reports; 'regression' marks slowdowns above threshold"""
+    old = {(entry['benchmark'], entry['n'], entry['k']): entry for entry in baseline['results'] if 'seconds' in entry}
+    rows = []
+    for entry in current['results']:
+        key = (entry['benchmark'], entry['n'], entry['k'])
+        if 'seconds' not in entry or key not in old:
+            continue
+        ratio = entry['seconds'] / old[key]['seconds'] if old[key]['seconds'] else float('inf')
+        rows.append({'benchmark': key[0], 'n': key[1], 'k': key[2],
+                     'baseline_seconds': old[key]['seconds'], 'seconds': entry['seconds'],
+                     'ratio': ratio, 'regression': ratio > threshold})
+    return rows
+
+def _metadata(seed, repeats) -> dict:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': np.__version__ if np is not None else None,
+        'seed': seed,
+        'repeats': repeats,
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def _format_entry(entry) -> str:
+    head = f"{entry['benchmark']:<36} n={entry['n']:<6} k={entry['k']:.4f}"
+    if 'skipped' in entry:
+        return f"{head}  skipped ({entry['skipped']})"
+    memory = f"  peak {entry['peak_bytes'] / 1024:,.0f} KiB" if 'peak_bytes' in entry else ""
+    return f"{head}  {entry['seconds'] * 1000:12.3f} ms{memory}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark graph generation, analysis and routing")
+    parser.add_argument('--n', default=DEFAULT_SIZES, help='vertex counts, same syntax as batch_runner')
+    parser.add_argument('--k', default='K1,K2', help='k coefficients, e.g. "0.65,0.7" or "K1,K2"')
+    parser.add_argument('--seed', type=int, default=config.SEED)
+    parser.add_argument('--only', help='comma separated benchmark names (default: all)')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs per measurement (best is kept)')
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help='skip measurements predicted to run longer than this')
+    parser.add_argument('--max-dense-cells', type=int, default=MAX_DENSE_CELLS,
+                        help='skip benchmarks whose dense n×n input or output is larger than this')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare against an earlier JSON report')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio reported as a regression (exit status 1)')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    report = run_benchmarks(names, parse_int_values(args.n), parse_k_values(args.k), args.seed,
+                            args.repeats, not args.no_memory, args.max_seconds, args.max_dense_cells,
+                            log=sys.stderr)
+    for name, by_k in report['exponents'].items():
+        fitted = ", ".join(f"k={k}: {value:.2f}" if value is not None else f"k={k}: -" for k, value in by_k.items())
+        print(f"{name:<36} scaling exponent {fitted}", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            rows = compare_reports(json.load(baseline_file), report, args.threshold)
+        for row in rows:
+            flag = "  REGRESSION" if row['regression'] else ""
+            print(f"{row['benchmark']:<36} n={row['n']:<6} k={row['k']:.4f}  "
+                  f"{row['baseline_seconds'] * 1000:10.3f} → {row['seconds'] * 1000:10.3f} ms  "
+                  f"×{row['ratio']:.2f}{flag}")
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -20,4 +20,14 @@ ROWS, COLS = GRID_SIZE, GRID_SIZE
 # UI constants
 CANVAS_SIZE = 600
 MARGIN = 50
-NODE_RADIUS = 15
\ No newline at end of file
+NODE_RADIUS = 15
+
+# Above this many edges graphs are drawn without routing, curves or arrows
+LOD_EDGE_THRESHOLD = 2000
+
+# From this many vertices the grid layout is replaced by the force-directed one
+FORCE_LAYOUT_MIN_VERTICES = 100
+FORCE_LAYOUT_TIME_BUDGET = 2.0  # seconds
+
+# Larger matrices are shown in the paged matrix viewer instead of as text
+MATRIX_TEXT_MAX_SIZE = 50
\ No newline at end of file
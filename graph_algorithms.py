@@ -2,43 +2,205 @@
 Graph Algorithms Module
 Handles path finding, connectivity analysis, and advanced graph algorithms
 """
-from graph_generator import matrix_power
+from array import array
 
-def find_paths_of_length(matrix: list[list[int]], length: int) -> list[tuple]:
-    """Find all paths of given length using matrix powers"""
-    matrix_power_result = matrix_power(matrix, length)
-    paths = []
+from analysis_cache import cached
+from profiler import profiled
+from graph_generator import matrix_multiply
+from sparse_graph import CSRGraph, adjacency_lists, to_matrix
+
+@profiled
+@cached
+def find_paths_of_length(matrix: list[list[int]] | CSRGraph, length: int) -> list[list[int]]:
+    """Find all paths of given length, grouped by start and then end vertex"""
+    return [list(path) for path in iter_paths_of_length(matrix, length, by_end=True)]
+
+@profiled
+@cached
+def find_actual_paths(matrix: list[list[int]] | CSRGraph, start: int, end: int, length: int) -> list[list[int]]:
+    """Find actual paths between vertices using DFS"""
+    adjacency = adjacency_lists(matrix)
+    can_finish = _finish_masks(adjacency, length, {end})
+    return [list(path) for path in _iter_paths_from(adjacency, start, length, can_finish)]
+
+@profiled
+def iter_paths_of_length(matrix: list[list[int]] | CSRGraph, length: int,
+                         max_count: int | None = None, targets=None, by_end: bool = False):
+    """Lazily yield every path of given length as a tuple of vertices
     
-    n = len(matrix)
-    for i in range(n):
-        for j in range(n):
-            if matrix_power_result[i][j] > 0:
-                # Find actual paths using DFS
-                actual_paths = find_actual_paths(matrix, i, j, length)
-                paths.extend(actual_paths)
+    Each start vertex is walked once with a single reused path buffer, so
+    memory stays O(length) no matter how many paths exist. Paths come out in
+    lexicographic order. max_count stops after that many paths; targets
+    restricts the end vertex to the given collection. by_end groups the
+    paths of each start vertex by end vertex instead, in the order of
+    find_paths_of_length; it holds one start vertex's paths at a time.
+    """
+    if max_count is not None and max_count <= 0:
+        return
+    
+    adjacency = adjacency_lists(matrix)
+    can_finish = _finish_masks(adjacency, length, set(targets) if targets is not None else None)
+    count = 0
     
-    return paths
+    for start in range(len(adjacency)):
+        found = _iter_paths_from(adjacency, start, length, can_finish)
+        if by_end:
+            # Stable sort keeps DFS order among paths with the same end vertex
+            found = sorted(found, key=lambda path: path[-1])
+        for path in found:
+            yield path
+            count += 1
+            if count == max_count:
+                return
 
-def find_actual_paths(matrix: list[list[int]], start: int, end: int, length: int) -> list[list[int]]:
-    """Find actual paths between vertices using DFS"""
-    def dfs(current: int, target: int, remaining: int, path: list[int]) -> list[list[int]]:
-        if remaining == 0:
-            return [path] if current == target else []
-        
-        paths = []
-        for next_vertex in range(len(matrix)):
-            if matrix[current][next_vertex] == 1:
-                paths.extend(dfs(next_vertex, target, remaining - 1, path + [next_vertex]))
+def _finish_masks(adjacency: list[list[int]], length: int, target_set) -> list[int]:
+    """Bit v of mask r is set when some path of r steps from v ends in a target"""
+    all_vertices = (1 << len(adjacency)) - 1
+    can_finish = [sum(1 << v for v in target_set) if target_set is not None else all_vertices]
+    for _ in range(length):
+        previous = can_finish[-1]
+        bits = 0
+        for vertex, neighbours in enumerate(adjacency):
+            if any(previous >> next_vertex & 1 for next_vertex in neighbours):
+                bits |= 1 << vertex
+        can_finish.append(bits)
+    return can_finish
+
+def _iter_paths_from(adjacency: list[list[int]], start: int, length: int, can_finish: list[int]):
+    """Yield all paths of given length from start with an explicit DFS stack"""
+    if not can_finish[length] >> start & 1:
+        return
+    if length == 0:
+        yield (start,)
+        return
+    
+    path = [start]
+    iterators = [iter(adjacency[start])]
+    while iterators:
+        next_vertex = next(iterators[-1], None)
+        if next_vertex is None:
+            iterators.pop()
+            path.pop()
+            continue
         
-        return paths
+        remaining = length - len(path)
+        if not can_finish[remaining] >> next_vertex & 1:
+            continue
+        if remaining == 0:
+            yield (*path, next_vertex)
+        else:
+            path.append(next_vertex)
+            iterators.append(iter(adjacency[next_vertex]))
+
+@profiled
+@cached
+def count_paths(matrix: list[list[int]] | CSRGraph, max_length: int, min_length: int = 1) -> dict:
+    """Count paths of every length in [min_length, max_length] without enumerating them
+    
+    Returns {'matrices': {k: A^k}, 'totals': {k: sum of A^k}}. Each A^k is
+    obtained from A^(k-1) with one multiplication; counts are exact Python ints
+    (matrix_multiply switches to object arithmetic once they may exceed int64).
+    """
+    matrices = {}
+    totals = {}
+    power = None
     
-    return dfs(start, end, length, [start])
+    for k in range(1, max_length + 1):
+        if power is None:
+            power = [list(map(int, row)) for row in to_matrix(matrix)]
+        elif isinstance(matrix, CSRGraph):
+            power = _multiply_by_sparse(power, matrix)
+        else:
+            power = matrix_multiply(power, matrix)
+        if k >= min_length:
+            matrices[k] = power
+            totals[k] = sum(map(sum, power))
+    
+    return {'matrices': matrices, 'totals': totals}
 
-def transitive_closure(matrix: list[list[int]]) -> list[list[int]]:
-    """Calculate transitive closure using Floyd-Warshall algorithm"""
+@profiled
+@cached
+def count_paths_totals(matrix: list[list[int]] | CSRGraph, max_length: int, min_length: int = 1) -> dict[int, int]:
+    """Count all paths of every length in [min_length, max_length], O(E) per length
+    
+    Propagates per-vertex path counts instead of building A^k matrices.
+    """
+    adjacency = adjacency_lists(matrix)
+    counts = [1] * len(adjacency)  # paths of length 0 ending at each vertex
+    totals = {}
+    
+    for k in range(1, max_length + 1):
+        next_counts = [0] * len(adjacency)
+        for vertex, neighbours in enumerate(adjacency):
+            count = counts[vertex]
+            if count:
+                for next_vertex in neighbours:
+                    next_counts[next_vertex] += count
+        counts = next_counts
+        if k >= min_length:
+            totals[k] = sum(counts)
+    
+    return totals
+
+@profiled
+@cached
+def count_simple_paths(matrix: list[list[int]] | CSRGraph, max_length: int) -> dict[int, list[list[int]]]:
+    """Count simple paths (no repeated vertices) between every pair for lengths 1..max_length
+    
+    Runs a bounded DFS over neighbour lists that carries the visited set as a
+    bitset, so the work grows with the number of simple paths up to max_length
+    rather than with n^k.
+    """
+    adjacency = adjacency_lists(matrix)
+    n = len(adjacency)
+    counts = {k: [[0] * n for _ in range(n)] for k in range(1, max_length + 1)}
+    
+    for start in range(n):
+        stack = [(start, 1 << start, 0)]
+        while stack:
+            vertex, visited, steps = stack.pop()
+            if steps == max_length:
+                continue
+            row = counts[steps + 1][start]
+            for next_vertex in adjacency[vertex]:
+                if not visited >> next_vertex & 1:
+                    row[next_vertex] += 1
+                    stack.append((next_vertex, visited | 1 << next_vertex, steps + 1))
+    
+    return counts
+
+def _multiply_by_sparse(power: list[list[int]], graph: CSRGraph) -> list[list[int]]:
+    """Multiply a dense count matrix by a CSR adjacency matrix, O(n·E)"""
+    adjacency = graph.adjacency_lists()
+    result = []
+    for row in power:
+        new_row = [0] * graph.n
+        for j, count in enumerate(row):
+            if count:
+                for m in adjacency[j]:
+                    new_row[m] += count
+        result.append(new_row)
+    return result
+
+@profiled
+@cached
+def transitive_closure(matrix: list[list[int]] | CSRGraph, method: str = "condensation") -> list[list[int]]:
+    """Calculate transitive closure (reachability matrix, diagonal included)
+    
+    method is "condensation" (bitsets propagated over the SCC DAG, default),
+    "bitset" (Floyd-Warshall on whole-row bitsets) or "floyd" (textbook
+    Floyd-Warshall over list cells).
+    """
     n = len(matrix)
+    if method == "condensation":
+        return bitsets_to_matrix(transitive_closure_condensed(matrix), n)
+    if method == "bitset":
+        return bitsets_to_matrix(transitive_closure_bitsets(matrix), n)
+    if method != "floyd":
+        raise ValueError(f"Unknown closure method: {method}")
+    
     # Initialize with original matrix
-    closure = [row[:] for row in matrix]
+    closure = [row[:] for row in to_matrix(matrix)]
     
     # Add self-loops for reachability
     for i in range(n):
@@ -52,26 +214,218 @@ def transitive_closure(matrix: list[list[int]]) -> list[list[int]]:
     
     return closure
 
-def strong_connectivity_matrix(matrix: list[list[int]]) -> list[list[int]]:
-    """Calculate strong connectivity matrix"""
-    reachability = transitive_closure(matrix)
+@profiled
+@cached
+def transitive_closure_bitsets(matrix: list[list[int]] | CSRGraph) -> list[int]:
+    """Calculate reachability rows as int bitsets with Floyd-Warshall over whole rows
+    
+    Bit j of row i is set when j is reachable from i; n²/8 bytes in total.
+    """
+    return _warshall_bitsets(_adjacency_bitsets(adjacency_lists(matrix)))
+
+def _warshall_bitsets(rows: list[int]) -> list[int]:
+    """Close reflexive bitset rows in place with Floyd-Warshall over whole rows"""
+    n = len(rows)
+    for k in range(n):
+        row_k = rows[k]
+        for i in range(n):
+            if rows[i] >> k & 1:
+                rows[i] |= row_k
+    
+    return rows
+
+@profiled
+@cached
+def transitive_closure_condensed(matrix: list[list[int]] | CSRGraph) -> list[int]:
+    """Calculate reachability rows as int bitsets by closing over the SCC condensation
+    
+    Components are closed in reverse topological order of the (cached)
+    condensation DAG, so every component only needs the already finished rows
+    of its successors. Vertices of one component share a single row object.
+    """
+    dag = condensation_dag(matrix)
+    members = [0] * len(dag)
+    for vertex, label in enumerate(dag.labels):
+        members[label] |= 1 << vertex
+    
+    reach = [0] * len(dag)
+    for label in reversed(dag.order):
+        bits = members[label]
+        for successor in dag.graph.neighbors(label):
+            bits |= reach[successor]
+        reach[label] = bits
+    
+    return [reach[label] for label in dag.labels]
+
+@profiled
+def bitsets_to_matrix(rows: list[int], n: int) -> list[list[int]]:
+    """Expand int bitset rows into a dense 0/1 matrix"""
+    expanded = {}
+    matrix = []
+    for bits in rows:
+        # Rows shared between vertices of one component are expanded once
+        if bits not in expanded:
+            expanded[bits] = list(map(int, format(bits, f"0{n}b")[::-1])) if n else []
+        matrix.append(expanded[bits][:])
+    return matrix
+
+def _adjacency_bitsets(adjacency: list[list[int]]) -> list[int]:
+    """Convert neighbour lists into reflexive int bitset rows"""
+    rows = []
+    for vertex, neighbours in enumerate(adjacency):
+        bits = 1 << vertex
+        for next_vertex in neighbours:
+            bits |= 1 << next_vertex
+        rows.append(bits)
+    return rows
+
+@profiled
+@cached
+def strong_connectivity_matrix(matrix: list[list[int]] | CSRGraph, method: str = "labels") -> list[list[int]]:
+    """Calculate strong connectivity matrix
+    
+    method "labels" marks vertices of the same Tarjan component (O(V+E) plus
+    output); "closure" intersects the closures of the graph and its transpose.
+    """
     n = len(matrix)
+    adjacency = adjacency_lists(matrix)
+    
+    if method == "labels":
+        labels = tarjan_scc_labels(adjacency)
+        members = {}
+        for vertex, label in enumerate(labels):
+            members[label] = members.get(label, 0) | 1 << vertex
+        strong_rows = [members[label] for label in labels]
+    elif method == "closure":
+        reachability = _warshall_bitsets(_adjacency_bitsets(adjacency))
+        
+        # Transpose matrix
+        transpose = [[] for _ in range(n)]
+        for i, neighbours in enumerate(adjacency):
+            for j in neighbours:
+                transpose[j].append(i)
+        reachability_transpose = _warshall_bitsets(_adjacency_bitsets(transpose))
+        
+        # Strong connectivity: reachable in both directions
+        strong_rows = [reachability[i] & reachability_transpose[i] for i in range(n)]
+    else:
+        raise ValueError(f"Unknown strong connectivity method: {method}")
     
-    # Transpose matrix
-    transpose = [[matrix[j][i] for j in range(n)] for i in range(n)]
-    reachability_transpose = transitive_closure(transpose)
+    return bitsets_to_matrix(strong_rows, n)
+
+@profiled
+@cached
+def find_strongly_connected_components(matrix: list[list[int]] | CSRGraph) -> list[list[int]]:
+    """Find strongly connected components (Tarjan, O(V+E))
     
-    # Strong connectivity: reachable in both directions
-    strong_conn = [[0 for _ in range(n)] for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            strong_conn[i][j] = reachability[i][j] and reachability_transpose[i][j]
+    Components are ordered by their smallest vertex, vertices inside each
+    component ascending. The condensation DAG is built and cached with them.
+    """
+    return condensation_dag(matrix).components()
+
+class CondensationDAG:
+    """Condensation of a directed graph: one vertex per SCC, parallel edges merged
+    
+    labels[v] is the component of vertex v, graph the DAG edges in CSR form,
+    order a topological order of the components and sizes their vertex
+    counts. The analysis cache hands out a copy() on every hit.
+    """
+
+    def __init__(self, labels, graph, order, sizes):
+        self.labels = labels
+        self.graph = graph
+        self.order = order
+        self.sizes = sizes
+
+    @classmethod
+    def from_labels(cls, labels, graph):
+        """Complete labels plus DAG edges with sizes and a topological order (Kahn, O(C + E))"""
+        n = graph.n
+        sizes = [0] * n
+        for label in labels:
+            sizes[label] += 1
+        in_degrees = graph.in_degrees()
+        order = [label for label in range(n) if not in_degrees[label]]
+        for label in order:  # order grows while it is scanned
+            for successor in graph.neighbors(label):
+                in_degrees[successor] -= 1
+                if not in_degrees[successor]:
+                    order.append(successor)
+        if len(order) != n:
+            raise ValueError("Component labels do not form a DAG (a strongly connected component is split)")
+        return cls(labels, graph, order, sizes)
+
+    def __len__(self):
+        return self.graph.n
+
+    def copy(self):
+        return CondensationDAG(self.labels[:], self.graph.copy(), self.order[:], self.sizes[:])
+
+    def edges(self):
+        return self.graph.edges()
+
+    def components(self) -> list[list[int]]:
+        """Vertices of every component, ascending"""
+        components = [[] for _ in range(len(self))]
+        for vertex, label in enumerate(self.labels):
+            components[label].append(vertex)
+        return components
+
+    def to_matrix(self) -> list[list[int]]:
+        """Dense C×C matrix, as returned by create_condensation_graph"""
+        return self.graph.to_matrix()
+
+@profiled
+@cached
+def condensation_dag(matrix: list[list[int]] | CSRGraph) -> CondensationDAG:
+    """SCC labels and condensation DAG of a graph, computed together in O(V+E)
+    
+    Components are numbered by their smallest vertex, matching
+    find_strongly_connected_components.
+    """
+    adjacency = adjacency_lists(matrix)
+    renumber = {}
+    labels = [renumber.setdefault(label, len(renumber)) for label in tarjan_scc_labels(adjacency)]
+    return CondensationDAG.from_labels(labels, _condensation_edges(adjacency, labels))
+
+@profiled
+def build_condensation(matrix: list[list[int]] | CSRGraph, labels) -> CondensationDAG:
+    """Condensation DAG for a vertex → component label array (labels 0..C-1, any order)"""
+    labels = list(labels)
+    return CondensationDAG.from_labels(labels, _condensation_edges(adjacency_lists(matrix), labels))
+
+def _condensation_edges(adjacency: list[list[int]], labels: list[int]) -> CSRGraph:
+    """Deduplicated edges between different labels in O(V + E)"""
+    num_components = max(labels) + 1 if labels else 0
+    members = [[] for _ in range(num_components)]
+    for vertex, label in enumerate(labels):
+        members[label].append(vertex)
+    
+    # seen[c] == label marks c as already linked from the current component,
+    # which deduplicates edges without a set per component
+    seen = [-1] * num_components
+    offsets = array('q', [0])
+    indices = array('i')
+    for label, vertices in enumerate(members):
+        seen[label] = label
+        successors = []
+        for vertex in vertices:
+            for next_vertex in adjacency[vertex]:
+                target = labels[next_vertex]
+                if seen[target] != label:
+                    seen[target] = label
+                    successors.append(target)
+        successors.sort()
+        indices.extend(successors)
+        offsets.append(len(indices))
     
-    return strong_conn
+    return CSRGraph(num_components, offsets, indices)
 
-def find_strongly_connected_components(matrix: list[list[int]]) -> list[list[int]]:
-    """Find strongly connected components"""
-    strong_conn = strong_connectivity_matrix(matrix)
+@profiled
+@cached
+def find_strongly_connected_components_closure(matrix: list[list[int]]) -> list[list[int]]:
+    """Find strongly connected components from the closure-based strong connectivity matrix"""
+    strong_conn = strong_connectivity_matrix(matrix, method="closure")
     n = len(matrix)
     visited = [False] * n
     components = []
@@ -87,24 +441,78 @@ def find_strongly_connected_components(matrix: list[list[int]]) -> list[list[int
     
     return components
 
-def create_condensation_graph(matrix: list[list[int]], components: list[list[int]]) -> list[list[int]]:
-    """Create condensation graph from strongly connected components"""
-    num_components = len(components)
-    condensation = [[0 for _ in range(num_components)] for _ in range(num_components)]
+@profiled
+@cached
+def tarjan_scc_labels(adjacency: list[list[int]]) -> list[int]:
+    """Label every vertex with its SCC index using iterative Tarjan's algorithm
+    
+    Components are numbered in the order Tarjan completes them, which is a
+    reverse topological order of the condensation graph.
+    """
+    n = len(adjacency)
+    index = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    labels = [-1] * n
+    stack = []
+    counter = 0
+    num_components = 0
+    
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        
+        # Explicit DFS stack of (vertex, next neighbour position) instead of recursion
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        call_stack = [(root, 0)]
+        
+        while call_stack:
+            v, pos = call_stack[-1]
+            neighbours = adjacency[v]
+            
+            if pos < len(neighbours):
+                call_stack[-1] = (v, pos + 1)
+                w = neighbours[pos]
+                if index[w] == -1:
+                    index[w] = lowlink[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    call_stack.append((w, 0))
+                elif on_stack[w] and index[w] < lowlink[v]:
+                    lowlink[v] = index[w]
+                continue
+            
+            call_stack.pop()
+            if call_stack:
+                parent = call_stack[-1][0]
+                if lowlink[v] < lowlink[parent]:
+                    lowlink[parent] = lowlink[v]
+            
+            if lowlink[v] == index[v]:
+                # v is the root of a component: pop it off the stack
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    labels[w] = num_components
+                    if w == v:
+                        break
+                num_components += 1
+    
+    return labels
+
+@profiled
+@cached
+def create_condensation_graph(matrix: list[list[int]] | CSRGraph, components: list[list[int]]) -> list[list[int]]:
+    """Create condensation graph (dense C×C matrix) from strongly connected components
     
-    # Create mapping from vertex to component
-    vertex_to_component = {}
+    Prefer condensation_dag for large graphs: it keeps the DAG sparse.
+    """
+    labels = [0] * len(matrix)
     for comp_idx, component in enumerate(components):
         for vertex in component:
-            vertex_to_component[vertex] = comp_idx
-    
-    # Build condensation graph
-    for i in range(len(matrix)):
-        for j in range(len(matrix)):
-            if matrix[i][j] == 1:
-                comp_i = vertex_to_component[i]
-                comp_j = vertex_to_component[j]
-                if comp_i != comp_j:
-                    condensation[comp_i][comp_j] = 1
-    
-    return condensation
\ No newline at end of file
+            labels[vertex] = comp_idx
+    return _condensation_edges(adjacency_lists(matrix), labels).to_matrix()
\ No newline at end of file
@@ -2,37 +2,94 @@
 Graph Analyzer Module
 Handles degree calculations, regularity checks, and basic graph properties
 """
+from itertools import islice
+from operator import add
 
-def calculate_degrees(matrix: list[list[int]], is_directed: bool = False) -> dict:
+try:
+    import numpy as np
+except ImportError:  # NumPy input is optional
+    np = None
+
+from analysis_cache import cached
+from profiler import profiled
+from sparse_graph import CSRGraph, PackedUndirected
+
+@profiled
+@cached
+def calculate_degrees(matrix: list[list[int]] | CSRGraph, is_directed: bool = False) -> dict:
     """Calculate vertex degrees"""
-    n = len(matrix)
-    result = {}
+    summary = degree_summary(matrix, is_directed)
+    if is_directed:
+        return {key: summary[key] for key in ('in_degrees', 'out_degrees', 'total_degrees')}
+    return {'degrees': summary['degrees']}
+
+@profiled
+@cached
+def degree_summary(matrix, is_directed: bool = False) -> dict:
+    """Calculate degrees, regularity, hanging and isolated vertices in one batch
+    
+    Directed graphs get 'in_degrees', 'out_degrees' and 'total_degrees';
+    undirected graphs get 'degrees' (self-loops count as 2). Both also get
+    'regular', 'regular_degree', 'hanging' and 'isolated', computed from the
+    total degrees. Accepts dense lists, CSRGraph, PackedUndirected or NumPy
+    arrays.
+    """
+    if isinstance(matrix, PackedUndirected):
+        if not is_directed:
+            result = {'degrees': matrix.degrees()}
+            result.update(_degree_properties(result['degrees']))
+            return result
+        # Symmetric storage: in-degree equals out-degree (row sum, loop counted once)
+        loops = [matrix.get(i, i) for i in range(matrix.n)]
+        out_degrees = [degree - loop for degree, loop in zip(matrix.degrees(), loops)]
+        in_degrees = out_degrees[:]
+    elif isinstance(matrix, CSRGraph):
+        out_degrees = matrix.out_degrees()
+        in_degrees = matrix.in_degrees() if is_directed else None
+        loops = None if is_directed else [int(matrix.has_edge(i, i)) for i in range(matrix.n)]
+    elif np is not None and isinstance(matrix, np.ndarray):
+        out_degrees = matrix.sum(axis=1).tolist()
+        in_degrees = matrix.sum(axis=0).tolist() if is_directed else None
+        loops = None if is_directed else matrix.diagonal().tolist()
+    else:
+        # Row sums and zip(*) column sums run in C instead of per-cell Python loops
+        out_degrees = list(map(sum, matrix))
+        in_degrees = list(map(sum, zip(*matrix))) if is_directed else None
+        loops = None if is_directed else [matrix[i][i] for i in range(len(matrix))]
     
     if is_directed:
-        # For directed graph: in-degree and out-degree
-        in_degrees = [sum(matrix[j][i] for j in range(n)) for i in range(n)]
-        out_degrees = [sum(matrix[i]) for i in range(n)]
-        result = {
-            'in_degrees': in_degrees,
-            'out_degrees': out_degrees,
-            'total_degrees': [in_degrees[i] + out_degrees[i] for i in range(n)]
-        }
+        total_degrees = list(map(add, in_degrees, out_degrees))
+        result = {'in_degrees': in_degrees, 'out_degrees': out_degrees, 'total_degrees': total_degrees}
     else:
-        # For undirected graph: simple degree (count each edge once, self-loops count as 2)
-        degrees = []
-        for i in range(n):
-            degree = 0
-            for j in range(n):
-                if matrix[i][j] == 1:
-                    if i == j:
-                        degree += 2  # Self-loop counts as 2
-                    else:
-                        degree += 1
-            degrees.append(degree)
-        result = {'degrees': degrees}
+        # Self-loop adds one to its row sum but counts as 2
+        total_degrees = list(map(add, out_degrees, loops))
+        result = {'degrees': total_degrees}
     
+    result.update(_degree_properties(total_degrees))
     return result
 
+def _degree_properties(degrees: list[int]) -> dict:
+    """Regularity plus hanging/isolated vertices from a single scan of degrees"""
+    hanging = []
+    isolated = []
+    regular = bool(degrees)
+    first_degree = degrees[0] if degrees else 0
+    for i, degree in enumerate(degrees):
+        if degree != first_degree:
+            regular = False
+        if degree == 1:
+            hanging.append(i)
+        elif degree == 0:
+            isolated.append(i)
+    return {
+        'regular': regular,
+        'regular_degree': first_degree if regular else 0,
+        'hanging': hanging,
+        'isolated': isolated,
+    }
+
+@profiled
+@cached
 def is_regular_graph(degrees: list[int]) -> tuple[bool, int]:
     """Check if graph is regular and return regularity degree"""
     if not degrees:
@@ -42,25 +99,33 @@ def is_regular_graph(degrees: list[int]) -> tuple[bool, int]:
     is_regular = all(deg == first_degree for deg in degrees)
     return is_regular, first_degree if is_regular else 0
 
+@profiled
+@cached
 def find_special_vertices(degrees: list[int]) -> dict:
     """Find hanging (degree 1) and isolated (degree 0) vertices"""
     hanging = [i for i, deg in enumerate(degrees) if deg == 1]
     isolated = [i for i, deg in enumerate(degrees) if deg == 0]
     return {'hanging': hanging, 'isolated': isolated}
 
-def format_paths_compact(paths: list[list[int]], paths_per_line: int = 4) -> str:
-    """Format paths in compact horizontal layout"""
-    if not paths:
-        return "  Немає шляхів\n"
+@profiled
+def format_paths_compact(paths, paths_per_line: int = 4) -> str:
+    """Format paths in compact horizontal layout
     
-    result = ""
-    for i in range(0, len(paths), paths_per_line):
-        line_paths = paths[i:i + paths_per_line]
-        path_strings = []
-        for path in line_paths:
-            path_str = "→".join(map(str, path))
-            path_strings.append(path_str)
-        result += "  " + " | ".join(path_strings) + "\n"
+    paths may be any iterable (e.g. iter_paths_of_length); it is consumed
+    one line at a time and the lines are joined once at the end.
+    """
+    paths = iter(paths)
+    lines = []
+    count = 0
+    while True:
+        line_paths = list(islice(paths, paths_per_line))
+        if not line_paths:
+            break
+        count += len(line_paths)
+        lines.append("  " + " | ".join("→".join(map(str, path)) for path in line_paths) + "\n")
+    
+    if not count:
+        return "  Немає шляхів\n"
     
-    result += f"\nЗагальна кількість шляхів: {len(paths)}\n"
-    return result
\ No newline at end of file
+    lines.append(f"\nЗагальна кількість шляхів: {count}\n")
+    return "".join(lines)
\ No newline at end of file
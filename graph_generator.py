@@ -4,55 +4,253 @@ Handles matrix generation and basic graph operations
 """
 import random
 import math
+from array import array
+from itertools import chain
+from operator import or_
 
-def generate_Adir(n: int, k: float, seed: int) -> list[list[int]]:
-    """Generate directed adjacency matrix with given coefficient k"""
-    random.seed(seed)  # Reset seed for consistency
-    return [
-        [0 if random.uniform(0, 2.0) * k < 1.0 else 1 for _ in range(n)]
-        for _ in range(n)
-    ]
+try:
+    import numpy as np
+except ImportError:  # NumPy backend is optional
+    np = None
 
-def make_Aundir(Adir: list[list[int]]) -> list[list[int]]:
-    """Convert directed matrix to undirected - FIXED VERSION"""
-    n = len(Adir)
-    Aundir = [[0 for _ in range(n)] for _ in range(n)]
+from analysis_cache import cached
+from profiler import profiled
+from sparse_graph import CSRGraph, PackedUndirected
+
+# Below this size the pure Python code is faster than converting to NumPy
+NUMPY_MIN_SIZE = 64
+
+@profiled
+def generate_Adir(n: int, k: float, seed: int, mode: str = "legacy") -> list[list[int]]:
+    """Generate directed adjacency matrix with given coefficient k
     
-    # Process each pair of vertices only once to ensure symmetry
-    for i in range(n):
-        for j in range(i, n):  # Only process upper triangle and diagonal
-            if i == j:
-                # Self-loops: keep if exists in directed graph
-                Aundir[i][j] = Adir[i][j]
-            else:
-                # Regular edges: if there's an edge in either direction, add undirected edge
-                if Adir[i][j] == 1 or Adir[j][i] == 1:
-                    Aundir[i][j] = 1
-                    Aundir[j][i] = 1  # Make symmetric
+    mode "legacy" reproduces the original random-module matrices exactly for
+    a given seed; "numpy" draws the whole matrix in one vectorized call from
+    a NumPy Generator (a different, faster random stream). Both use a local
+    RNG instead of reseeding the global random module.
+    """
+    return [row for chunk in iter_Adir_rows(n, k, seed, max(n, 1), mode) for row in chunk]
+
+@profiled
+def iter_Adir_rows(n: int, k: float, seed: int, chunk_rows: int = 1024, mode: str = "legacy"):
+    """Yield the rows of generate_Adir(n, k, seed, mode) in lists of up to chunk_rows rows"""
+    for chunk in _iter_row_chunks(n, k, seed, chunk_rows, mode):
+        yield chunk.tolist() if mode == "numpy" else chunk
+
+@profiled
+def generate_edges(n: int, k: float, seed: int, mode: str = "legacy", chunk_rows: int = 1024) -> CSRGraph:
+    """Generate the same graph as generate_Adir directly in CSR form
     
-    return Aundir
+    Rows are produced chunk by chunk, so the dense n×n matrix never exists.
+    """
+    offsets = array('q', [0])
+    indices = array('i')
+    for chunk in _iter_row_chunks(n, k, seed, chunk_rows, mode):
+        if mode == "numpy":
+            indices.frombytes(np.nonzero(chunk)[1].astype(np.int32).tobytes())
+            offsets.extend((offsets[-1] + np.cumsum(np.count_nonzero(chunk, axis=1))).tolist())
+        else:
+            for row in chunk:
+                indices.extend(j for j, value in enumerate(row) if value)
+                offsets.append(len(indices))
+    return CSRGraph(n, offsets, indices)
 
-def matrix_multiply(A: list[list[int]], B: list[list[int]]) -> list[list[int]]:
+@profiled
+def generate_edges_family(n: int, k_values: list[float], seed: int, mode: str = "legacy",
+                          chunk_rows: int = 1024) -> list[CSRGraph]:
+    """Generate generate_edges(n, k, seed, mode) for every k from one shared random draw
+    
+    All graphs threshold the same uniforms, so the draw happens once however
+    many k values there are, and the graph for a larger k contains the graph
+    for a smaller one. With NumPy the thresholds run vectorized per row chunk.
+    """
+    offsets = [array('q', [0]) for _ in k_values]
+    indices = [array('i') for _ in k_values]
+    for chunk in _iter_uniform_chunks(n, seed, chunk_rows, mode):
+        if np is not None:
+            chunk = np.asarray(chunk, dtype=np.float64).reshape(-1, n)
+        for graph, k in enumerate(k_values):
+            if np is not None:
+                # Same comparison as _iter_row_chunks, so edges match generate_edges exactly
+                mask = chunk * k >= 1.0
+                indices[graph].frombytes(np.nonzero(mask)[1].astype(np.int32).tobytes())
+                offsets[graph].extend((offsets[graph][-1] + np.cumsum(np.count_nonzero(mask, axis=1))).tolist())
+            else:
+                for row in chunk:
+                    indices[graph].extend(j for j, value in enumerate(row) if value * k >= 1.0)
+                    offsets[graph].append(len(indices[graph]))
+    return [CSRGraph(n, offsets[graph], indices[graph]) for graph in range(len(k_values))]
+
+def _iter_uniform_chunks(n: int, seed: int, chunk_rows: int, mode: str):
+    """Yield the uniforms of _iter_row_chunks, scaled to [0, 2), before thresholding"""
+    if mode == "legacy":
+        uniform = random.Random(seed).random
+        for start in range(0, n, chunk_rows):
+            yield [[2.0 * uniform() for _ in range(n)] for _ in range(min(chunk_rows, n - start))]
+    elif mode == "numpy":
+        if np is None:
+            raise ImportError("NumPy generation mode requires NumPy")
+        rng = np.random.default_rng(seed)
+        for start in range(0, n, chunk_rows):
+            yield rng.uniform(0, 2.0, size=(min(chunk_rows, n - start), n))
+    else:
+        raise ValueError(f"Unknown generation mode: {mode}")
+
+def _iter_row_chunks(n: int, k: float, seed: int, chunk_rows: int, mode: str):
+    """Yield row chunks: lists of lists in legacy mode, 0/1 NumPy arrays in numpy mode"""
+    if mode == "legacy":
+        # random.uniform(0, 2.0) is exactly 2.0 * random(), so this matches the
+        # original random.seed(seed) stream bit for bit
+        uniform = random.Random(seed).random
+        for start in range(0, n, chunk_rows):
+            yield [
+                [0 if 2.0 * uniform() * k < 1.0 else 1 for _ in range(n)]
+                for _ in range(min(chunk_rows, n - start))
+            ]
+    elif mode == "numpy":
+        if np is None:
+            raise ImportError("NumPy generation mode requires NumPy")
+        # Consecutive draws from one Generator equal a single large draw,
+        # so the chunk size does not change the resulting graph
+        rng = np.random.default_rng(seed)
+        for start in range(0, n, chunk_rows):
+            rows = min(chunk_rows, n - start)
+            yield (rng.uniform(0, 2.0, size=(rows, n)) * k >= 1.0).astype(np.int8)
+    else:
+        raise ValueError(f"Unknown generation mode: {mode}")
+
+@profiled
+def make_Aundir(Adir: list[list[int]] | CSRGraph) -> list[list[int]] | CSRGraph:
+    """Convert directed matrix to undirected: A | Aᵀ with the diagonal preserved"""
+    if np is not None and isinstance(Adir, np.ndarray):
+        return Adir | Adir.T
+    if isinstance(Adir, CSRGraph):
+        return CSRGraph.from_edges(Adir.n, chain(Adir.edges(), ((j, i) for i, j in Adir.edges())))
+    # Row i OR column i, cell by cell in C; the diagonal ORs with itself
+    return [list(map(or_, row, column)) for row, column in zip(Adir, zip(*Adir))]
+
+@profiled
+def make_Aundir_packed(Adir: list[list[int]]) -> PackedUndirected:
+    """Convert directed matrix to undirected packed upper-triangular storage"""
+    return PackedUndirected.from_directed(Adir)
+
+@profiled
+def matrix_multiply(A: list[list[int]], B: list[list[int]], backend: str = "auto") -> list[list[int]]:
     """Multiply two matrices"""
+    if _use_numpy(A, backend):
+        # Magnitudes are read from the lists: entries beyond int64 cannot be converted to check them
+        dtype = "int64" if _fits_int64(len(A), _max_abs(A), _max_abs(B)) else "object"
+        return _matmul(np.array(A, dtype=dtype), np.array(B, dtype=dtype)).tolist()
+    
     n = len(A)
+    columns = list(zip(*B))
     result = [[0 for _ in range(n)] for _ in range(n)]
     
     for i in range(n):
+        # Skip zero entries of A's row: adjacency matrices are mostly zeros
+        row_terms = [(k, a) for k, a in enumerate(A[i]) if a]
+        result_row = result[i]
         for j in range(n):
-            for k in range(n):
-                result[i][j] += A[i][k] * B[k][j]
+            column = columns[j]
+            result_row[j] = sum(a * column[k] for k, a in row_terms)
     
     return result
 
-def matrix_power(matrix: list[list[int]], power: int) -> list[list[int]]:
-    """Calculate matrix to the given power"""
+@profiled
+@cached
+def matrix_power(matrix: list[list[int]], power: int, backend: str = "auto") -> list[list[int]]:
+    """Calculate matrix to the given power using exponentiation by squaring"""
     n = len(matrix)
+    if power == 0:
+        # A^0 is the identity matrix
+        return [[int(i == j) for j in range(n)] for i in range(n)]
     if power == 1:
         return [row[:] for row in matrix]  # Copy matrix
     
-    result = matrix_power(matrix, power - 1)
-    return matrix_multiply(matrix, result)
+    if _use_numpy(matrix, backend):
+        dtype = "int64" if _power_fits_int64(n, _max_abs(matrix), power) else "object"
+        return matrix_power_np(matrix, power, dtype).tolist()
+    
+    result = None
+    base = [row[:] for row in matrix]
+    while power > 0:
+        if power & 1:
+            result = base if result is None else matrix_multiply(result, base, "python")
+        power >>= 1
+        if power:
+            base = matrix_multiply(base, base, "python")
+    
+    return result
+
+@profiled
+def matrix_power_np(matrix, power: int, dtype: str = "int64"):
+    """Calculate matrix power with NumPy using O(log p) multiplications
+    
+    dtype is "int64" (fast, may overflow for huge counts), "object" (exact
+    Python integers) or "bool" (reachability only: entry is True when at least
+    one walk of that length exists).
+    """
+    if np is None:
+        raise ImportError("matrix_power_np requires NumPy")
+    if dtype not in ("int64", "object", "bool"):
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    
+    base = np.array(matrix, dtype=dtype)
+    result = np.identity(len(base), dtype=dtype)
+    while power > 0:
+        if power & 1:
+            result = _matmul(result, base)
+        power >>= 1
+        if power:
+            base = _matmul(base, base)
+    
+    return result
+
+def _matmul(a, b):
+    """Multiply NumPy matrices, routing exact-safe integer products through BLAS"""
+    if a.dtype == np.int64 and _fits_float64(len(a), _max_entry(a), _max_entry(b)):
+        # float64 BLAS is exact while every partial sum stays below 2^53
+        return (a.astype(np.float64) @ b.astype(np.float64)).astype(np.int64)
+    return a @ b
+
+def _use_numpy(matrix, backend: str) -> bool:
+    if backend == "python":
+        return False
+    if backend == "numpy":
+        if np is None:
+            raise ImportError("NumPy backend requested but NumPy is not installed")
+        return True
+    return np is not None and len(matrix) >= NUMPY_MIN_SIZE
+
+def _max_entry(a) -> int:
+    return int(np.abs(a).max()) if a.size else 0
+
+def _max_abs(matrix) -> int:
+    """Largest entry magnitude of a list matrix, without converting it to int64"""
+    return max((max(map(abs, row), default=0) for row in matrix), default=0)
+
+def _fits_int64(n: int, max_a: int, max_b: int) -> bool:
+    return n * max_a * max_b < 2 ** 63
+
+def _power_fits_int64(n: int, max_entry: int, power: int) -> bool:
+    """Entries of A^power never exceed (n * max)^(power - 1) * max; check that bound against int64
+    
+    The bound is grown one factor at a time and the loop stops as soon as it
+    overflows, so a large power never builds a huge integer.
+    """
+    if n * max_entry <= 1:
+        return max_entry < 2 ** 63
+    bound = max_entry
+    for _ in range(power - 1):
+        bound *= n * max_entry
+        if bound >= 2 ** 63:
+            return False
+    return bound < 2 ** 63
+
+def _fits_float64(n: int, max_a: int, max_b: int) -> bool:
+    return n * max_a * max_b < 2 ** 53
 
+@profiled
 def calculate_grid_size(n: int) -> tuple[int, int]:
     """Calculate optimal grid size for vertex positioning"""
     grid_size = math.ceil(math.sqrt(n))
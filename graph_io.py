@@ -0,0 +1,231 @@
+﻿"""
+Graph IO Module
+Compact binary graph files (CSR arrays plus optional derived results) with memory-mapped loading
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from analysis_cache import prime_cache
+from sparse_graph import CSRGraph, to_csr
+from graph_algorithms import (find_strongly_connected_components, transitive_closure,
+                              transitive_closure_condensed, create_condensation_graph, bitsets_to_matrix,
+                              condensation_dag, CondensationDAG)
+
+# File layout (all integers little-endian):
+#   header   magic, version, reserved, n, section count
+#   table    one (name, offset, length in bytes) entry per section
+#   sections raw data, each starting on an 8-byte boundary
+MAGIC = b"GRPH"
+VERSION = 1
+HEADER = struct.Struct("<4sHHqI")
+SECTION = struct.Struct("<16sqq")
+ALIGNMENT = 8
+
+# Array sections and their typecodes; "closure" holds bit-packed rows instead
+ARRAY_SECTIONS = {
+    'offsets': 'q',       # CSR row offsets, n + 1 entries
+    'indices': 'i',       # CSR column indices
+    'scc_labels': 'i',    # component of each vertex, numbered as in find_strongly_connected_components
+    'cond_offsets': 'q',  # condensation graph in CSR form
+    'cond_indices': 'i',
+}
+
+def save_graph(path, matrix, closure=None, components=None, condensation=None) -> None:
+    """Write a graph and, optionally, derived results to a binary graph file
+
+    matrix is a dense matrix or CSRGraph. closure may be bitset rows (as from
+    transitive_closure_condensed) or a dense 0/1 matrix; it is stored with
+    one bit per cell. components is the find_strongly_connected_components
+    list, condensation a dense matrix or CSRGraph over those components.
+    """
+    graph = to_csr(matrix)
+    n = graph.n
+    sections = [('offsets', graph.offsets), ('indices', graph.indices)]
+    if components is not None:
+        labels = array('i', [0]) * n
+        for index, component in enumerate(components):
+            for vertex in component:
+                labels[vertex] = index
+        sections.append(('scc_labels', labels))
+    if condensation is not None:
+        condensation = to_csr(condensation)
+        sections += [('cond_offsets', condensation.offsets), ('cond_indices', condensation.indices)]
+    if closure is not None:
+        sections.append(('closure', closure))
+
+    row_bytes = _row_bytes(n)
+    entries = []
+    offset = _align(HEADER.size + SECTION.size * len(sections))
+    for name, data in sections:
+        length = row_bytes * n if name == 'closure' else len(data) * array(ARRAY_SECTIONS[name]).itemsize
+        entries.append((name, offset, length))
+        offset = _align(offset + length)
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, n, len(sections)))
+        for name, section_offset, length in entries:
+            file.write(SECTION.pack(name.encode('ascii'), section_offset, length))
+        for (name, data), (_, section_offset, _) in zip(sections, entries):
+            file.write(b"\0" * (section_offset - file.tell()))
+            if name == 'closure':
+                # One row at a time, so a dense closure is never packed in memory as a whole
+                for row in data:
+                    file.write(_pack_row(row, row_bytes))
+            else:
+                file.write(_to_little_endian(data, ARRAY_SECTIONS[name]))
+
+def load_graph(path) -> "GraphFile":
+    """Open a binary graph file; arrays are memory-mapped, not read"""
+    return GraphFile(path)
+
+class GraphFile:
+    """Read-only view of a saved graph
+
+    graph, labels and condensation are backed by memoryviews into an mmap of
+    the file, so opening is O(1) in the file size and the OS pages in only
+    the rows that are touched. Call close() (or use a with block) once the
+    arrays are no longer needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path}: empty file is not a graph file")
+        self._views = []
+
+        magic, version, _, self.n, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a graph file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported graph file version {version}")
+        self.sections = {}
+        for index in range(count):
+            name, offset, length = SECTION.unpack_from(self._map, HEADER.size + SECTION.size * index)
+            self.sections[name.rstrip(b"\0").decode('ascii')] = (offset, length)
+
+        self.graph = CSRGraph(self.n, self._array('offsets'), self._array('indices'))
+        self.labels = self._array('scc_labels') if 'scc_labels' in self.sections else None
+        self.condensation = None
+        if 'cond_offsets' in self.sections:
+            offsets = self._array('cond_offsets')
+            self.condensation = CSRGraph(len(offsets) - 1, offsets, self._array('cond_indices'))
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def components(self) -> list[list[int]]:
+        """Strongly connected components in find_strongly_connected_components order"""
+        if self.labels is None:
+            raise KeyError(f"{self.path}: no SCC labels stored")
+        components = [[] for _ in range(max(self.labels, default=-1) + 1)]
+        for vertex, label in enumerate(self.labels):
+            components[label].append(vertex)
+        return components
+
+    def closure_row(self, i: int) -> int:
+        """Reachability row i as a bitset (bit j set when j is reachable from i)"""
+        offset, _ = self.sections['closure']
+        row_bytes = _row_bytes(self.n)
+        start = offset + i * row_bytes
+        return int.from_bytes(self._map[start:start + row_bytes], 'little')
+
+    def closure(self) -> list[int]:
+        """All reachability rows, as returned by transitive_closure_condensed"""
+        return [self.closure_row(i) for i in range(self.n)]
+
+    def prime_cache(self, matrix=None) -> None:
+        """Seed the analysis cache with the stored results for matrix
+
+        matrix defaults to the memory-mapped graph; pass the dense copy when
+        the rest of the program works on lists. Afterwards the SCC,
+        condensation and closure functions return the stored results instead
+        of recomputing them.
+        """
+        matrix = self.graph if matrix is None else matrix
+        if self.labels is not None:
+            components = self.components()
+            prime_cache(find_strongly_connected_components, components, matrix)
+            if self.condensation is not None:
+                # Copy out of the mmap: cached results outlive this file
+                graph = CSRGraph(self.condensation.n, array('q', self.condensation.offsets),
+                                 array('i', self.condensation.indices))
+                prime_cache(condensation_dag, CondensationDAG.from_labels(list(self.labels), graph), matrix)
+                prime_cache(create_condensation_graph, graph.to_matrix(), matrix, components)
+        if 'closure' in self.sections:
+            rows = self.closure()
+            prime_cache(transitive_closure_condensed, rows, matrix)
+            prime_cache(transitive_closure, bitsets_to_matrix(rows, self.n), matrix)
+
+    def close(self):
+        """Release the memory map; arrays obtained from this file become invalid
+        
+        Slices a caller still holds (e.g. from graph.neighbors()) stay valid
+        and keep the mapping alive: it is then unmapped when the last of them
+        is dropped instead of here. Drop them first to unmap immediately.
+        """
+        if self._map is None:
+            return
+        self.graph = self.labels = self.condensation = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # exported slices remain; the mmap object unmaps once they are freed
+        self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _array(self, name):
+        offset, length = self.sections[name]
+        typecode = ARRAY_SECTIONS[name]
+        if sys.byteorder != 'little':
+            data = array(typecode, self._map[offset:offset + length])
+            data.byteswap()
+            return data
+        view = memoryview(self._map)[offset:offset + length]
+        self._views.append(view)
+        cast = view.cast(typecode)
+        self._views.append(cast)
+        return cast
+
+def save_analysis(path, matrix) -> None:
+    """Compute SCCs, condensation and closure of matrix and save them with it"""
+    dag = condensation_dag(matrix)
+    save_graph(path, matrix,
+               closure=transitive_closure_condensed(matrix),
+               components=dag.components(),
+               condensation=dag.graph)
+
+def _row_bytes(n: int) -> int:
+    return (n + 7) // 8
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _pack_row(row, row_bytes: int) -> bytes:
+    """Bitset int or dense 0/1 row -> little-endian bytes, bit j = column j"""
+    if not isinstance(row, int):
+        row = int("".join('1' if value else '0' for value in reversed(row)) or "0", 2)
+    return row.to_bytes(row_bytes, 'little')
+
+def _to_little_endian(data, typecode: str):
+    data = array(typecode, data) if not isinstance(data, array) or data.typecode != typecode else data
+    if sys.byteorder != 'little':
+        data = array(typecode, data)
+        data.byteswap()
+    return data
\ No newline at end of file
@@ -0,0 +1,275 @@
+﻿"""
+Graph Layout Module
+Force-directed (Fruchterman-Reingold) layout with Barnes–Hut repulsion and multilevel coarsening
+"""
+import math
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # without NumPy the exact O(n²) pure Python iteration is used
+    np = None
+
+from analysis_cache import AnalysisCache, matrix_fingerprint
+from sparse_graph import adjacency_lists
+
+# Layouts are reused across redraws and graph switches
+layout_cache = AnalysisCache(maxsize=16)
+
+# Up to this many vertices repulsion is computed exactly between all pairs
+EXACT_REPULSION_LIMIT = 1000
+# Barnes–Hut opening angle: a cell is one body when side / distance is below this
+BARNES_HUT_THETA = 1.0
+# Quadtree cells are split until they hold at most LEAF_SIZE vertices or MAX_TREE_DEPTH is reached
+LEAF_SIZE = 16
+MAX_TREE_DEPTH = 20
+# Multilevel coarsening stops at this many vertices
+COARSEST_SIZE = 32
+
+def force_directed_layout(matrix, iterations: int = 100, time_budget: float | None = None,
+                          multilevel: bool = True, seed: int = 0) -> list[tuple[float, float]]:
+    """Lay out a graph in the unit square; returns one (x, y) per vertex
+
+    Edge direction and self-loops are ignored. Repulsion is exact for small
+    graphs and approximated with a Barnes–Hut quadtree above
+    EXACT_REPULSION_LIMIT vertices (O(n log n) per iteration). multilevel=True lays out a chain of coarsened graphs (edge
+    matching) first and refines each finer level from its parent's
+    positions. time_budget (seconds) caps the total work on top of the
+    iteration count. Results are cached per graph and parameters.
+    """
+    key = (matrix_fingerprint(matrix), iterations, time_budget, multilevel, seed)
+    cached_layout = layout_cache.get(key)
+    if cached_layout is not None:
+        return cached_layout[:]
+
+    adjacency = adjacency_lists(matrix)
+    n = len(adjacency)
+    edges = sorted({(min(u, v), max(u, v)) for u in range(n) for v in adjacency[u] if u != v})
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+
+    # Build the coarsening hierarchy: levels[0] is the input graph
+    levels = [(n, edges, None)]
+    while multilevel and levels[-1][0] > COARSEST_SIZE:
+        coarse_n, coarse_edges, parent = _coarsen(levels[-1][0], levels[-1][1], rng)
+        if coarse_n > 0.9 * levels[-1][0]:
+            break  # matching no longer shrinks the graph
+        levels.append((coarse_n, coarse_edges, parent))
+
+    positions = None
+    for depth in range(len(levels) - 1, -1, -1):
+        level_n, level_edges, _ = levels[depth]
+        if positions is None:
+            positions = [(rng.random(), rng.random()) for _ in range(level_n)]
+            level_iterations = iterations
+            start_temperature = 0.1
+        else:
+            # Children start next to their parent with a small jitter
+            parent = levels[depth + 1][2]
+            positions = [(positions[parent[v]][0] + rng.uniform(-0.01, 0.01),
+                          positions[parent[v]][1] + rng.uniform(-0.01, 0.01)) for v in range(level_n)]
+            level_iterations = max(10, iterations // 2)
+            start_temperature = 0.05
+        level_deadline = None
+        if deadline is not None:
+            # Split what is left of the budget evenly over the remaining levels
+            level_deadline = time.perf_counter() + max(0.0, deadline - time.perf_counter()) / (depth + 1)
+        positions = _fruchterman_reingold(level_n, level_edges, positions, level_iterations,
+                                          start_temperature, level_deadline)
+
+    positions = _normalize(positions)
+    layout_cache.put(key, positions)
+    return positions[:]
+
+def _coarsen(n, edges, rng):
+    """Collapse a random maximal edge matching; returns (n, edges, parent of each vertex)"""
+    neighbours = [[] for _ in range(n)]
+    for u, v in edges:
+        neighbours[u].append(v)
+        neighbours[v].append(u)
+
+    parent = [-1] * n
+    coarse_n = 0
+    order = list(range(n))
+    rng.shuffle(order)
+    for u in order:
+        if parent[u] != -1:
+            continue
+        parent[u] = coarse_n
+        for v in neighbours[u]:
+            if parent[v] == -1:
+                parent[v] = coarse_n
+                break
+        coarse_n += 1
+
+    coarse_edges = sorted({(min(parent[u], parent[v]), max(parent[u], parent[v]))
+                           for u, v in edges if parent[u] != parent[v]})
+    return coarse_n, coarse_edges, parent
+
+def _fruchterman_reingold(n, edges, positions, iterations, temperature, deadline):
+    if n <= 1:
+        return [(0.5, 0.5)] * n
+    if np is not None:
+        return _fruchterman_reingold_numpy(n, edges, positions, iterations, temperature, deadline)
+    return _fruchterman_reingold_python(n, edges, positions, iterations, temperature, deadline)
+
+def _fruchterman_reingold_numpy(n, edges, positions, iterations, temperature, deadline):
+    pos = np.array(positions, dtype=float)
+    edge_array = np.array(edges, dtype=np.intp).reshape(-1, 2)
+    k = math.sqrt(1.0 / n)
+    cooling = temperature / max(1, iterations)
+
+    for _ in range(iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if n <= EXACT_REPULSION_LIMIT:
+            disp = _repulsion_exact_numpy(pos, k)
+        else:
+            disp = _repulsion_barnes_hut_numpy(pos, k)
+
+        # Attraction along edges: d²/k towards each other
+        if len(edge_array):
+            delta = pos[edge_array[:, 0]] - pos[edge_array[:, 1]]
+            distance = np.sqrt((delta ** 2).sum(axis=1)) + 1e-9
+            force = delta * (distance / k)[:, None]
+            for axis in range(2):
+                disp[:, axis] -= np.bincount(edge_array[:, 0], weights=force[:, axis], minlength=n)
+                disp[:, axis] += np.bincount(edge_array[:, 1], weights=force[:, axis], minlength=n)
+
+        # Move at most `temperature` per step
+        length = np.sqrt((disp ** 2).sum(axis=1)) + 1e-9
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature = max(temperature - cooling, 1e-4)
+
+    return [tuple(point) for point in pos.tolist()]
+
+def _repulsion_exact_numpy(pos, k, chunk=512):
+    disp = np.zeros_like(pos)
+    for start in range(0, len(pos), chunk):
+        delta = pos[start:start + chunk, None, :] - pos[None, :, :]
+        distance_sq = (delta ** 2).sum(axis=2) + 1e-9
+        disp[start:start + chunk] = (delta * (k * k / distance_sq)[:, :, None]).sum(axis=1)
+    return disp
+
+def _repulsion_barnes_hut_numpy(pos, k, theta=BARNES_HUT_THETA, chunk=2048):
+    """k²/d repulsion approximated with a Barnes–Hut quadtree
+    
+    A cell acts as one body at its centroid when side / distance < theta and
+    the vertex lies outside it; other cells are opened, down to the leaves,
+    whose vertices repel exactly. The tree is built level by level from
+    Morton codes and a chunk of vertices descends it at once. O(n log n) per
+    iteration for layouts of bounded depth; cells split until they hold
+    LEAF_SIZE vertices, but at most MAX_TREE_DEPTH times, so m vertices
+    closer than span / 2^MAX_TREE_DEPTH still cost O(m²).
+    """
+    n = len(pos)
+    low = pos.min(axis=0)
+    span = float((pos.max(axis=0) - low).max()) or 1.0
+    scale = 1 << MAX_TREE_DEPTH
+    grid = np.minimum(((pos - low) * (scale / span)).astype(np.int64), scale - 1)
+    code = np.zeros(n, dtype=np.int64)
+    for bit in range(MAX_TREE_DEPTH):
+        code |= ((grid[:, 0] >> bit) & 1) << (2 * bit)
+        code |= ((grid[:, 1] >> bit) & 1) << (2 * bit + 1)
+    order = np.argsort(code, kind="stable")
+    sorted_pos = pos[order]
+
+    # Per level: sorted ids of the non-empty cells, their first vertex in `order`, sizes and centroids.
+    # Splitting stops once no leaf holds more than LEAF_SIZE vertices.
+    levels = []
+    for level in range(MAX_TREE_DEPTH + 1):
+        ids, starts, counts = np.unique(code[order] >> (2 * (MAX_TREE_DEPTH - level)),
+                                        return_index=True, return_counts=True)
+        centroids = np.add.reduceat(sorted_pos, starts, axis=0) / counts[:, None]
+        levels.append((ids, starts, counts, centroids))
+        if counts.max() <= LEAF_SIZE:
+            break
+    depth = len(levels) - 1
+    code >>= 2 * (MAX_TREE_DEPTH - depth)
+
+    disp = np.zeros_like(pos)
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        vertices = np.arange(start, stop)
+        cells = np.zeros(len(vertices), dtype=np.intp)
+        for level, (ids, starts, counts, centroids) in enumerate(levels):
+            delta = pos[vertices] - centroids[cells]
+            distance_sq = (delta ** 2).sum(axis=1) + 1e-9
+            size = span / (1 << level)
+            far = (size * size < theta * theta * distance_sq) & ((code[vertices] >> (2 * (depth - level))) != ids[cells])
+            weight = counts[cells[far]] * (k * k) / distance_sq[far]
+            for axis in range(2):
+                disp[start:stop, axis] += np.bincount(vertices[far] - start, weights=delta[far, axis] * weight,
+                                                      minlength=stop - start)
+            vertices, cells = vertices[~far], cells[~far]
+            if level == depth:
+                break
+            # Open the remaining cells: pair each vertex with every non-empty child
+            children = levels[level + 1][0]
+            first = np.searchsorted(children, ids[cells] << 2)
+            fanout = np.searchsorted(children, (ids[cells] << 2) + 4) - first
+            vertices, cells = vertices.repeat(fanout), _expand_ranges(first, fanout)
+
+        # Leaves that stayed open: exact pairs with their members (the vertex itself adds zero)
+        _, starts, counts, _ = levels[depth]
+        members = order[_expand_ranges(starts[cells], counts[cells])]
+        vertices = vertices.repeat(counts[cells])
+        delta = pos[vertices] - pos[members]
+        weight = (k * k) / ((delta ** 2).sum(axis=1) + 1e-9)
+        for axis in range(2):
+            disp[start:stop, axis] += np.bincount(vertices - start, weights=delta[:, axis] * weight,
+                                                  minlength=stop - start)
+    return disp
+
+def _expand_ranges(first, lengths):
+    """Concatenation of range(first[i], first[i] + lengths[i]) for every i"""
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(int(lengths.sum())) - offsets.repeat(lengths) + first.repeat(lengths)
+
+def _fruchterman_reingold_python(n, edges, positions, iterations, temperature, deadline):
+    pos = [list(point) for point in positions]
+    k_sq = 1.0 / n
+    k = math.sqrt(k_sq)
+    cooling = temperature / max(1, iterations)
+
+    for _ in range(iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        disp = [[0.0, 0.0] for _ in range(n)]
+        for i in range(n):
+            xi, yi = pos[i]
+            for j in range(i + 1, n):
+                dx = xi - pos[j][0]
+                dy = yi - pos[j][1]
+                factor = k_sq / (dx * dx + dy * dy + 1e-9)
+                disp[i][0] += dx * factor
+                disp[i][1] += dy * factor
+                disp[j][0] -= dx * factor
+                disp[j][1] -= dy * factor
+        for u, v in edges:
+            dx = pos[u][0] - pos[v][0]
+            dy = pos[u][1] - pos[v][1]
+            factor = math.sqrt(dx * dx + dy * dy) / k
+            disp[u][0] -= dx * factor
+            disp[u][1] -= dy * factor
+            disp[v][0] += dx * factor
+            disp[v][1] += dy * factor
+        for i in range(n):
+            length = math.hypot(disp[i][0], disp[i][1]) + 1e-9
+            step = min(length, temperature) / length
+            pos[i][0] += disp[i][0] * step
+            pos[i][1] += disp[i][1] * step
+        temperature = max(temperature - cooling, 1e-4)
+
+    return [tuple(point) for point in pos]
+
+def _normalize(positions):
+    """Scale positions into the unit square, keeping the aspect ratio"""
+    if not positions:
+        return []
+    xs = [x for x, _ in positions]
+    ys = [y for _, y in positions]
+    min_x, min_y = min(xs), min(ys)
+    span = max(max(xs) - min_x, max(ys) - min_y) or 1.0
+    return [((x - min_x) / span, (y - min_y) / span) for x, y in positions]
\ No newline at end of file
@@ -2,9 +2,93 @@
 Graph Visualizer Module
 Handles graph drawing, smart routing, and visual representation
 """
-import tkinter as tk
 import math
 
+try:
+    from tkinter import LAST, NORMAL, HIDDEN
+except ImportError:  # Python built without Tk: off-screen canvases still work
+    LAST, NORMAL, HIDDEN = "last", "normal", "hidden"
+
+try:
+    import numpy as np
+except ImportError:  # vectorized collision checks are optional
+    np = None
+
+from graph_layout import force_directed_layout
+from profiler import profiled
+
+# Number of layouts whose spatial index and routes are kept for reuse
+MAX_CACHED_LAYOUTS = 8
+# Candidate count above which collision checks switch to NumPy
+NUMPY_MIN_CANDIDATES = 64
+
+class SpatialGrid:
+    """Uniform grid over node positions for fast segment-vs-node collision queries
+    
+    Also holds the route cache for its layout, keyed by (start, end).
+    """
+    
+    def __init__(self, positions, cell_size):
+        self.positions = positions
+        self.cell_size = cell_size
+        self.routes = {}
+        self.cells = {}
+        for pos in positions:
+            self.cells.setdefault(self._cell(*pos), []).append(pos)
+    
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+    
+    def candidates(self, x1, y1, x2, y2):
+        """Positions that can lie within cell_size / 2 of the segment
+        
+        The segment is sampled every half cell; any point closer than half a
+        cell to the segment falls in the 3×3 block around some sample.
+        """
+        steps = max(1, int(math.hypot(x2 - x1, y2 - y1) / (self.cell_size / 2)) + 1)
+        seen_cells = set()
+        for step in range(steps + 1):
+            t = step / steps
+            cx, cy = self._cell(x1 + (x2 - x1) * t, y1 + (y2 - y1) * t)
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    seen_cells.add((gx, gy))
+        found = []
+        for cell in seen_cells:
+            found.extend(self.cells.get(cell, ()))
+        return found
+    
+    def segment_blocked(self, x1, y1, x2, y2, clearance, start_pos, end_pos):
+        """Check whether any node other than start/end is closer than clearance to the segment"""
+        nearby = [pos for pos in self.candidates(x1, y1, x2, y2) if pos != start_pos and pos != end_pos]
+        if not nearby:
+            return False
+        
+        dx = x2 - x1
+        dy = y2 - y1
+        length_sq = dx * dx + dy * dy
+        limit = clearance * clearance
+        
+        if np is not None and len(nearby) >= NUMPY_MIN_CANDIDATES:
+            points = np.asarray(nearby, dtype=float)
+            if length_sq == 0:
+                t = 0.0
+            else:
+                t = np.clip(((points[:, 0] - x1) * dx + (points[:, 1] - y1) * dy) / length_sq, 0, 1)
+            dist_sq = (x1 + t * dx - points[:, 0]) ** 2 + (y1 + t * dy - points[:, 1]) ** 2
+            return bool((dist_sq < limit).any())
+        
+        for px, py in nearby:
+            if length_sq == 0:
+                t = 0
+            else:
+                t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+            closest_x = x1 + t * dx
+            closest_y = y1 + t * dy
+            if (closest_x - px) ** 2 + (closest_y - py) ** 2 < limit:
+                return True
+        return False
+
 class GraphVisualizer:
     def __init__(self, canvas, canvas_size=600, margin=50, node_radius=15):
         self.canvas = canvas
@@ -12,7 +96,13 @@ class GraphVisualizer:
         self.margin = margin
         self.node_radius = node_radius
         self.positions = []
+        
+        # Spatial index and route cache per layout (see get_spatial_index)
+        self._layout_grids = {}
+        self._indexed_positions = None
+        self._indexed_grid = None
     
+    @profiled
     def calculate_positions(self, n, rows, cols):
         """Calculate vertex positions in grid layout"""
         self.positions = []
@@ -25,6 +115,13 @@ class GraphVisualizer:
                     self.positions.append((x, y))
                     count += 1
     
+    @profiled
+    def calculate_force_positions(self, matrix, iterations=100, time_budget=None, multilevel=True):
+        """Calculate vertex positions with the force-directed layout (cached per graph)"""
+        layout = force_directed_layout(matrix, iterations, time_budget, multilevel)
+        extent = self.canvas_size - 2 * self.margin
+        self.positions = [(self.margin + x * extent, self.margin + y * extent) for x, y in layout]
+    
     def point_distance(self, x1, y1, x2, y2):
         """Calculate distance between two points"""
         return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
@@ -47,8 +144,37 @@ class GraphVisualizer:
         
         return self.point_distance(closest_x, closest_y, cx, cy)
     
+    @profiled
     def find_best_path(self, start_pos, end_pos, all_positions):
         """Find the best path between two nodes avoiding other nodes"""
+        grid = self.get_spatial_index(all_positions)
+        key = (tuple(start_pos), tuple(end_pos))
+        route = grid.routes.get(key)
+        if route is None:
+            route = self._route_path(start_pos, end_pos, grid)
+            grid.routes[key] = route
+        return route
+    
+    @profiled
+    def get_spatial_index(self, all_positions):
+        """Return the spatial grid (and route cache) for a layout, building it once per layout"""
+        if all_positions is self._indexed_positions:
+            return self._indexed_grid
+        
+        layout_key = tuple(map(tuple, all_positions))
+        grid = self._layout_grids.pop(layout_key, None)
+        if grid is None:
+            grid = SpatialGrid(layout_key, 2 * (self.node_radius + 8))
+        # Most recently used layouts stay cached so graph switches reuse their routes
+        self._layout_grids[layout_key] = grid
+        while len(self._layout_grids) > MAX_CACHED_LAYOUTS:
+            self._layout_grids.pop(next(iter(self._layout_grids)))
+        
+        self._indexed_positions = all_positions
+        self._indexed_grid = grid
+        return grid
+    
+    def _route_path(self, start_pos, end_pos, grid):
         x1, y1 = start_pos
         x2, y2 = end_pos
         
@@ -58,16 +184,7 @@ class GraphVisualizer:
             return start_pos, end_pos
         
         # Check if direct path intersects with other nodes
-        path_clear = True
-        for pos in all_positions:
-            if pos == start_pos or pos == end_pos:
-                continue
-            
-            px, py = pos
-            # Check if the line from start to end passes too close to this node
-            if self.line_circle_distance(x1, y1, x2, y2, px, py) < self.node_radius + 8:
-                path_clear = False
-                break
+        path_clear = not grid.segment_blocked(x1, y1, x2, y2, self.node_radius + 8, start_pos, end_pos)
         
         if path_clear:
             # Direct path is clear, just adjust for node radius
@@ -84,10 +201,14 @@ class GraphVisualizer:
                 return (start_x, start_y), (end_x, end_y)
         
         # If direct path is blocked, try curved path
-        return self.create_curved_path(start_pos, end_pos, all_positions)
+        return self._curved_path(start_pos, end_pos, grid)
     
+    @profiled
     def create_curved_path(self, start_pos, end_pos, all_positions):
         """Create a curved path that avoids other nodes"""
+        return self._curved_path(start_pos, end_pos, self.get_spatial_index(all_positions))
+    
+    def _curved_path(self, start_pos, end_pos, grid):
         x1, y1 = start_pos
         x2, y2 = end_pos
         
@@ -113,20 +234,11 @@ class GraphVisualizer:
                 curve_x = mid_x + perp_x * offset * direction
                 curve_y = mid_y + perp_y * offset * direction
                 
-                # Check if this curved path avoids other nodes
-                path_clear = True
-                for pos in all_positions:
-                    if pos == start_pos or pos == end_pos:
-                        continue
-                    
-                    px, py = pos
-                    # Check distance to both segments of the curve
-                    dist1 = self.line_circle_distance(x1, y1, curve_x, curve_y, px, py)
-                    dist2 = self.line_circle_distance(curve_x, curve_y, x2, y2, px, py)
-                    
-                    if dist1 < self.node_radius + 8 or dist2 < self.node_radius + 8:
-                        path_clear = False
-                        break
+                # Check if this curved path avoids other nodes (both segments of the curve)
+                clearance = self.node_radius + 8
+                path_clear = not (
+                    grid.segment_blocked(x1, y1, curve_x, curve_y, clearance, start_pos, end_pos)
+                    or grid.segment_blocked(curve_x, curve_y, x2, y2, clearance, start_pos, end_pos))
                 
                 if path_clear:
                     # Adjust for node radius
@@ -169,8 +281,18 @@ class GraphVisualizer:
         
         return start_pos, end_pos
     
-    def draw_smart_line(self, start_pos, end_pos, with_arrow=False):
-        """Draw a line with smart routing to avoid other nodes"""
+    @profiled
+    def draw_smart_line(self, start_pos, end_pos, with_arrow=False, tags=(), simple=False):
+        """Draw a line with smart routing to avoid other nodes; returns the canvas item ids
+        
+        simple=True is the level-of-detail mode: one straight line without
+        routing or arrow head.
+        """
+        if simple:
+            x1, y1 = start_pos
+            x2, y2 = end_pos
+            return [self.canvas.create_line(x1, y1, x2, y2, fill="black", width=1, tags=tags)]
+        
         path_result = self.find_best_path(start_pos, end_pos, self.positions)
         
         if len(path_result) == 3:
@@ -181,38 +303,48 @@ class GraphVisualizer:
             x2, y2 = end_pos
             
             # Draw the curve as two line segments
-            self.canvas.create_line(x1, y1, cx, cy, fill="black", width=2)
+            items = [self.canvas.create_line(x1, y1, cx, cy, fill="black", width=2, tags=tags)]
             if with_arrow:
-                self.canvas.create_line(cx, cy, x2, y2, fill="black", width=2, 
-                                      arrow=tk.LAST, arrowshape=(10, 12, 3))
+                items.append(self.canvas.create_line(cx, cy, x2, y2, fill="black", width=2, 
+                                                     arrow=LAST, arrowshape=(10, 12, 3), tags=tags))
             else:
-                self.canvas.create_line(cx, cy, x2, y2, fill="black", width=2)
-        else:
-            # Straight path
-            start_pos, end_pos = path_result
-            x1, y1 = start_pos
-            x2, y2 = end_pos
-            if with_arrow:
-                self.canvas.create_line(x1, y1, x2, y2, fill="black", width=2, 
-                                      arrow=tk.LAST, arrowshape=(10, 12, 3))
-            else:
-                self.canvas.create_line(x1, y1, x2, y2, fill="black", width=2)
+                items.append(self.canvas.create_line(cx, cy, x2, y2, fill="black", width=2, tags=tags))
+            return items
+        
+        # Straight path
+        start_pos, end_pos = path_result
+        x1, y1 = start_pos
+        x2, y2 = end_pos
+        if with_arrow:
+            return [self.canvas.create_line(x1, y1, x2, y2, fill="black", width=2, 
+                                            arrow=LAST, arrowshape=(10, 12, 3), tags=tags)]
+        return [self.canvas.create_line(x1, y1, x2, y2, fill="black", width=2, tags=tags)]
     
-    def draw_self_loop(self, x, y, with_arrow=False):
-        """Draw a self-loop at given position"""
+    @profiled
+    def draw_self_loop(self, x, y, with_arrow=False, tags=()):
+        """Draw a self-loop at given position; returns the canvas item ids"""
         r = self.node_radius
-        self.canvas.create_oval(x + r, y - r * 1.5, x - 2*r, y - r * 0.5, 
-                              outline="black", width=2)
+        items = [self.canvas.create_oval(x + r, y - r * 1.5, x - 2*r, y - r * 0.5, 
+                                         outline="black", width=2, tags=tags)]
         if with_arrow:
-            self.canvas.create_line(x + r/2, y - r * 1.5, x + r/2 + 5, y - r * 1.5 - 5, 
-                                  fill="black", width=2, arrow=tk.LAST, arrowshape=(8, 10, 3))
+            items.append(self.canvas.create_line(x + r/2, y - r * 1.5, x + r/2 + 5, y - r * 1.5 - 5, 
+                                                 fill="black", width=2, arrow=LAST, arrowshape=(8, 10, 3),
+                                                 tags=tags))
+        return items
     
-    def draw_node(self, x, y, label, color="lightblue"):
-        """Draw a single node"""
+    @profiled
+    def draw_node(self, x, y, label, color="lightblue", tags=()):
+        """Draw a single node; returns the canvas item ids"""
         r = self.node_radius
-        self.canvas.create_oval(x - r, y - r, x + r, y + r, fill=color, outline="black", width=2)
-        self.canvas.create_text(x, y, text=label, font=("Arial", 10, "bold"))
+        return [self.canvas.create_oval(x - r, y - r, x + r, y + r, fill=color, outline="black", width=2, tags=tags),
+                self.canvas.create_text(x, y, text=label, font=("Arial", 10, "bold"), tags=tags)]
+    
+    @profiled
+    def set_visible(self, tag, visible):
+        """Show or hide every canvas item carrying tag"""
+        self.canvas.itemconfigure(tag, state=NORMAL if visible else HIDDEN)
     
+    @profiled
     def get_condensation_positions(self, num_components):
         """Calculate positions for condensation graph"""
         positions = []
@@ -233,6 +365,7 @@ class GraphVisualizer:
                 positions.append((x, y))
         return positions
     
+    @profiled
     def clear_canvas(self):
         """Clear the canvas"""
         self.canvas.delete("all")
\ No newline at end of file
@@ -0,0 +1,348 @@
+﻿"""
+Image Renderer Module
+Off-screen canvases (SVG and raster PNG/PPM) that GraphVisualizer can draw into without Tk
+"""
+import math
+import struct
+import zlib
+from xml.sax.saxutils import escape
+
+try:
+    import numpy as np
+except ImportError:  # raster canvas falls back to a pure Python pixel buffer
+    np = None
+
+from graph_visualizer import GraphVisualizer
+from graph_generator import calculate_grid_size
+from sparse_graph import CSRGraph
+from config import CANVAS_SIZE, MARGIN, NODE_RADIUS, LOD_EDGE_THRESHOLD
+
+# Line pixels rasterised per NumPy chunk; bounds the temporary arrays of RasterCanvas
+RASTER_CHUNK_PIXELS = 1 << 18
+
+# Named Tk colours used by GraphVisualizer
+COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "lightblue": (173, 216, 230),
+    "red": (255, 0, 0),
+}
+
+# 3×5 bitmap glyphs for node labels in raster output
+GLYPHS = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "010", "010", "010"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+    "C": ("111", "100", "100", "100", "111"),
+}
+
+class OffscreenCanvas:
+    """Records canvas primitives with the subset of the tk.Canvas API GraphVisualizer uses
+
+    Items are only kept as data until save(), which writes all of them in one
+    pass, so tags, hiding and tag_raise behave like on a live canvas.
+    """
+
+    def __init__(self, width=CANVAS_SIZE, height=CANVAS_SIZE, background="white"):
+        self.width = width
+        self.height = height
+        self.background = background
+        self.items = {}  # id -> [kind, coords, options, tags]; dict order is stacking order
+        self._next_id = 1
+
+    def _create(self, kind, coords, options):
+        item = self._next_id
+        self._next_id += 1
+        tags = options.pop("tags", ())
+        self.items[item] = [kind, coords, options, set((tags,) if isinstance(tags, str) else tags)]
+        return item
+
+    def create_line(self, x1, y1, x2, y2, **options):
+        return self._create("line", (x1, y1, x2, y2), options)
+
+    def create_oval(self, x1, y1, x2, y2, **options):
+        return self._create("oval", (x1, y1, x2, y2), options)
+
+    def create_text(self, x, y, **options):
+        return self._create("text", (x, y), options)
+
+    def _find(self, tag_or_id):
+        if tag_or_id == "all":
+            return list(self.items)
+        return [item for item, (_, _, _, tags) in self.items.items() if item == tag_or_id or tag_or_id in tags]
+
+    def delete(self, tag_or_id):
+        for item in self._find(tag_or_id):
+            del self.items[item]
+
+    def itemconfigure(self, tag_or_id, **options):
+        for item in self._find(tag_or_id):
+            self.items[item][2].update(options)
+
+    def tag_raise(self, tag_or_id):
+        for item in self._find(tag_or_id):
+            self.items[item] = self.items.pop(item)
+
+    def visible_items(self):
+        for kind, coords, options, _ in self.items.values():
+            if options.get("state") != "hidden":
+                yield kind, coords, options
+
+class SVGCanvas(OffscreenCanvas):
+    """Off-screen canvas that streams its items to an SVG file"""
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                      f'viewBox="0 0 {self.width} {self.height}">\n')
+            out.write('<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="5" '
+                      'markerHeight="5" orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10 z"/></marker></defs>\n')
+            out.write(f'<rect width="100%" height="100%" fill="{self.background}"/>\n')
+            for kind, coords, options in self.visible_items():
+                out.write(self._element(kind, coords, options))
+            out.write("</svg>\n")
+
+    def _element(self, kind, coords, options):
+        if kind == "line":
+            x1, y1, x2, y2 = coords
+            marker = ' marker-end="url(#arrow)"' if options.get("arrow") == "last" else ""
+            return (f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
+                    f'stroke="{options.get("fill", "black")}" stroke-width="{options.get("width", 1)}"{marker}/>\n')
+        if kind == "oval":
+            x1, y1, x2, y2 = coords
+            fill = options.get("fill") or "none"
+            return (f'<ellipse cx="{(x1 + x2) / 2:.1f}" cy="{(y1 + y2) / 2:.1f}" rx="{abs(x2 - x1) / 2:.1f}" '
+                    f'ry="{abs(y2 - y1) / 2:.1f}" fill="{fill}" stroke="{options.get("outline", "black")}" '
+                    f'stroke-width="{options.get("width", 1)}"/>\n')
+        x, y = coords
+        font = options.get("font", ("Arial", 10, "bold"))
+        weight = "bold" if "bold" in font[2:] else "normal"
+        return (f'<text x="{x:.1f}" y="{y:.1f}" font-family="{font[0]}" font-size="{font[1]}pt" '
+                f'font-weight="{weight}" text-anchor="middle" dominant-baseline="central">'
+                f'{escape(str(options.get("text", "")))}</text>\n')
+
+class RasterCanvas(OffscreenCanvas):
+    """Off-screen canvas rasterised into an RGB pixel buffer (NumPy array when available)"""
+
+    def render(self):
+        """Rasterise all visible items; returns the pixel buffer"""
+        if np is not None:
+            self.pixels = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            self.pixels[:, :] = COLORS.get(self.background, COLORS["white"])
+        else:
+            self.pixels = bytearray(bytes(COLORS.get(self.background, COLORS["white"])) * (self.width * self.height))
+
+        # Consecutive lines (all edges, usually) are rasterised as one batch
+        batch = []
+        for kind, coords, options in self.visible_items():
+            if kind == "line":
+                batch.append((coords, options))
+                continue
+            self._draw_lines(batch)
+            batch = []
+            if kind == "oval":
+                self._draw_oval(coords, options)
+            else:
+                self._draw_text(coords, options)
+        self._draw_lines(batch)
+        return self.pixels
+
+    def to_bytes(self):
+        """Raw RGB bytes, row by row"""
+        return self.pixels.tobytes() if np is not None else bytes(self.pixels)
+
+    def save(self, path):
+        """Render and write a PNG (or binary PPM for .ppm paths)"""
+        self.render()
+        data = self.to_bytes()
+        if path.lower().endswith(".ppm"):
+            with open(path, "wb") as out:
+                out.write(b"P6 %d %d 255\n" % (self.width, self.height))
+                out.write(data)
+            return
+        _write_png(path, self.width, self.height, data)
+
+    def _line_segments(self, coords, options):
+        """Segments of a line (shaft and arrow head) and its thickness in pixels"""
+        x1, y1, x2, y2 = coords
+        segments = [(x1, y1, x2, y2)]
+        if options.get("arrow") == "last":
+            shape = options.get("arrowshape", (8, 10, 3))
+            angle = math.atan2(y2 - y1, x2 - x1)
+            for side in (-1, 1):
+                spread = angle + math.pi - side * math.atan2(shape[2], shape[0])
+                segments.append((x2, y2, x2 + shape[1] * math.cos(spread), y2 + shape[1] * math.sin(spread)))
+        return segments, max(1, int(round(options.get("width", 1))))
+
+    def _draw_lines(self, batch):
+        """Rasterise a batch of lines in chunks of about RASTER_CHUNK_PIXELS pixels
+        
+        Only one chunk of pixel coordinates exists at a time, so memory stays
+        bounded however many edges the batch holds.
+        """
+        if not batch:
+            return
+        if np is None:
+            for coords, options in batch:
+                rgb = COLORS.get(options.get("fill", "black"), COLORS["black"])
+                segments, width = self._line_segments(coords, options)
+                for sx1, sy1, sx2, sy2 in segments:
+                    steps = int(max(abs(sx2 - sx1), abs(sy2 - sy1))) + 1
+                    for step in range(steps):
+                        t = step / (steps - 1) if steps > 1 else 0
+                        x = int(round(sx1 + (sx2 - sx1) * t))
+                        y = int(round(sy1 + (sy2 - sy1) * t))
+                        for dx in range(width):
+                            for dy in range(width):
+                                self._set_pixel(x + dx, y + dy, rgb)
+            return
+
+        # (colour, width) -> segments waiting to be rasterised
+        pending = {}
+        pixels = 0
+        for coords, options in batch:
+            segments, width = self._line_segments(coords, options)
+            pending.setdefault((options.get("fill", "black"), width), []).extend(segments)
+            for sx1, sy1, sx2, sy2 in segments:
+                pixels += (int(max(abs(sx2 - sx1), abs(sy2 - sy1))) + 1) * width * width
+            if pixels >= RASTER_CHUNK_PIXELS:
+                self._fill_segments(pending)
+                pending = {}
+                pixels = 0
+        self._fill_segments(pending)
+
+    def _fill_segments(self, pending):
+        """Set the pixels of buffered segments, all of one chunk vectorised per colour and width"""
+        for (color, width), segments in pending.items():
+            rgb = COLORS.get(color, COLORS["black"])
+            sx1, sy1, sx2, sy2 = np.array(segments, dtype=np.float64).T
+            steps = np.maximum(np.abs(sx2 - sx1), np.abs(sy2 - sy1)).astype(np.intp) + 1
+            # Segment of every pixel and its position t in [0, 1] along that segment
+            segment = np.repeat(np.arange(len(steps)), steps)
+            position = np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)
+            t = position / np.maximum(steps - 1, 1)[segment]
+            xs = np.rint(sx1[segment] + (sx2 - sx1)[segment] * t).astype(np.intp)
+            ys = np.rint(sy1[segment] + (sy2 - sy1)[segment] * t).astype(np.intp)
+            for dx in range(width):
+                for dy in range(width):
+                    x = xs + dx
+                    y = ys + dy
+                    inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+                    self.pixels[y[inside], x[inside]] = rgb
+
+    def _draw_oval(self, coords, options):
+        x1, y1, x2, y2 = coords
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        rx, ry = max(abs(x2 - x1) / 2, 0.5), max(abs(y2 - y1) / 2, 0.5)
+        width = options.get("width", 1)
+        fill = COLORS.get(options.get("fill") or "", None)
+        outline = COLORS.get(options.get("outline", "black"), COLORS["black"])
+        left, right = max(0, int(cx - rx - width)), min(self.width, int(cx + rx + width) + 1)
+        top, bottom = max(0, int(cy - ry - width)), min(self.height, int(cy + ry + width) + 1)
+        if left >= right or top >= bottom:
+            return
+
+        # Normalised radius of each pixel; the outline band is `width` pixels wide
+        band = width / min(rx, ry)
+        if np is not None:
+            ys, xs = np.mgrid[top:bottom, left:right]
+            radius = np.sqrt(((xs - cx) / rx) ** 2 + ((ys - cy) / ry) ** 2)
+            region = self.pixels[top:bottom, left:right]
+            if fill is not None:
+                region[radius <= 1] = fill
+            region[np.abs(radius - 1) <= band / 2] = outline
+            return
+        for y in range(top, bottom):
+            for x in range(left, right):
+                radius = math.hypot((x - cx) / rx, (y - cy) / ry)
+                if abs(radius - 1) <= band / 2:
+                    self._set_pixel(x, y, outline)
+                elif fill is not None and radius <= 1:
+                    self._set_pixel(x, y, fill)
+
+    def _draw_text(self, coords, options):
+        text = str(options.get("text", ""))
+        scale = 2
+        x, y = coords
+        left = int(x - (len(text) * 4 - 1) * scale / 2)
+        top = int(y - 5 * scale / 2)
+        for index, char in enumerate(text.upper()):
+            glyph = GLYPHS.get(char)
+            if glyph is None:
+                continue
+            for row, bits in enumerate(glyph):
+                for column, bit in enumerate(bits):
+                    if bit == "1":
+                        for dy in range(scale):
+                            for dx in range(scale):
+                                self._set_pixel(left + (index * 4 + column) * scale + dx,
+                                                top + row * scale + dy, COLORS["black"])
+
+    def _set_pixel(self, x, y, rgb):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            if np is not None:
+                self.pixels[y, x] = rgb
+            else:
+                offset = (y * self.width + x) * 3
+                self.pixels[offset:offset + 3] = bytes(rgb)
+
+def render_graph(matrix, path, directed=True, condensation=False, size=CANVAS_SIZE, node_labels=None):
+    """Render an adjacency matrix or CSRGraph to .svg, .png or .ppm without Tk
+
+    Uses the same grid layout as the UI (calculate_positions) or the
+    condensation layout (get_condensation_positions). Graphs with more than
+    LOD_EDGE_THRESHOLD edges are drawn with plain straight lines.
+    """
+    canvas = SVGCanvas(size, size) if path.lower().endswith(".svg") else RasterCanvas(size, size)
+    visualizer = GraphVisualizer(canvas, canvas_size=size, margin=MARGIN, node_radius=NODE_RADIUS)
+    n = len(matrix)
+    if condensation:
+        visualizer.positions = visualizer.get_condensation_positions(n)
+        node_labels = node_labels or [f"C{i}" for i in range(n)]
+    else:
+        rows, cols = calculate_grid_size(n)
+        visualizer.calculate_positions(n, rows, cols)
+        node_labels = node_labels or [str(i) for i in range(n)]
+    positions = visualizer.positions
+
+    if isinstance(matrix, CSRGraph):
+        # CSR rows are sorted, so the edge order matches the dense scan below
+        edges = [(i, j) for i, j in matrix.edges() if directed or i <= j]
+    elif directed:
+        edges = [(i, j) for i in range(n) for j, value in enumerate(matrix[i]) if value]
+    else:
+        edges = [(i, j) for i in range(n) for j in range(i, n) if matrix[i][j]]
+    simple = len(edges) > LOD_EDGE_THRESHOLD
+
+    for i, j in edges:
+        if i == j:
+            if not simple:
+                visualizer.draw_self_loop(*positions[i], with_arrow=directed)
+        else:
+            visualizer.draw_smart_line(positions[i], positions[j], with_arrow=directed, simple=simple)
+    for i, (x, y) in enumerate(positions):
+        visualizer.draw_node(x, y, node_labels[i])
+
+    canvas.save(path)
+    return canvas
+
+def _write_png(path, width, height, rgb):
+    """Write 8-bit RGB data as a PNG using only zlib"""
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as out:
+        out.write(b"\x89PNG\r\n\x1a\n")
+        out.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        out.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        out.write(chunk(b"IEND", b""))
\ No newline at end of file
@@ -0,0 +1,194 @@
+﻿"""
+Incremental Analysis Module
+Keeps degrees, reachability, SCCs and the condensation graph up to date under edge updates
+"""
+from graph_analyzer import calculate_degrees
+from graph_algorithms import (tarjan_scc_labels, transitive_closure_condensed, bitsets_to_matrix,
+                              transitive_closure, find_strongly_connected_components,
+                              create_condensation_graph)
+from sparse_graph import CSRGraph
+
+class IncrementalGraphAnalysis:
+    """Directed graph analysis that is built once and then updated edge by edge
+
+    Reachability is stored as int bitset rows. Inserting an edge ORs rows
+    (O(n) big-int operations) and merges SCCs that close into a cycle.
+    Deleting an edge only recomputes what it can invalidate: the SCC it was
+    inside, and the closure when the edge was the last u → v route.
+    """
+
+    def __init__(self, matrix, check=False):
+        self.n = len(matrix)
+        self.check = check
+        self.successors = [set(j for j, value in enumerate(row) if value) for row in matrix]
+        self.in_degrees = [0] * self.n
+        for neighbours in self.successors:
+            for j in neighbours:
+                self.in_degrees[j] += 1
+        self.out_degrees = [len(neighbours) for neighbours in self.successors]
+        self._rebuild_components()
+        self._rebuild_reachability()
+        self._verify()
+
+    @property
+    def matrix(self):
+        """Current adjacency matrix (built on demand)"""
+        return [[int(j in neighbours) for j in range(self.n)] for neighbours in self.successors]
+
+    @property
+    def degrees(self):
+        """Degrees in the same format as calculate_degrees(..., is_directed=True)"""
+        return {
+            'in_degrees': self.in_degrees[:],
+            'out_degrees': self.out_degrees[:],
+            'total_degrees': [self.in_degrees[i] + self.out_degrees[i] for i in range(self.n)]
+        }
+
+    @property
+    def components(self):
+        """SCCs ordered by smallest vertex, like find_strongly_connected_components"""
+        components = []
+        component_index = {}
+        for vertex, label in enumerate(self.labels):
+            if label not in component_index:
+                component_index[label] = len(components)
+                components.append([])
+            components[component_index[label]].append(vertex)
+        return components
+
+    @property
+    def condensation(self):
+        """Condensation matrix indexed like components"""
+        order = {}
+        for label in self.labels:
+            if label not in order:
+                order[label] = len(order)
+        condensation = [[0] * len(order) for _ in range(len(order))]
+        for label_u, label_v in self._cross_edges:
+            condensation[order[label_u]][order[label_v]] = 1
+        return condensation
+
+    def reachability_matrix(self):
+        """Reachability matrix in the same format as transitive_closure"""
+        return bitsets_to_matrix(self.reach, self.n)
+
+    def is_reachable(self, u, v):
+        return bool(self.reach[u] >> v & 1)
+
+    def add_edge(self, u, v):
+        """Insert edge u → v; returns False if it already existed"""
+        if v in self.successors[u]:
+            return False
+        self.successors[u].add(v)
+        self.out_degrees[u] += 1
+        self.in_degrees[v] += 1
+
+        closes_cycle = self.reach[v] >> u & 1 and self.labels[u] != self.labels[v]
+
+        # Everything that reaches u now also reaches whatever v reaches
+        if not self.reach[u] >> v & 1:
+            reach_v = self.reach[v]
+            for x in range(self.n):
+                if self.reach[x] >> u & 1:
+                    self.reach[x] |= reach_v
+
+        if closes_cycle:
+            # Vertices on some v ~> u route join one component with u and v
+            ancestors_u = 0
+            for x in range(self.n):
+                if self.reach[x] >> u & 1:
+                    ancestors_u |= 1 << x
+            merged = self.reach[v] & ancestors_u
+            label = self._next_label
+            self._next_label += 1
+            for x in range(self.n):
+                if merged >> x & 1:
+                    self.labels[x] = label
+            self._rebuild_cross_edges()
+        elif self.labels[u] != self.labels[v]:
+            key = (self.labels[u], self.labels[v])
+            self._cross_edges[key] = self._cross_edges.get(key, 0) + 1
+
+        self._verify()
+        return True
+
+    def remove_edge(self, u, v):
+        """Delete edge u → v; returns False if it did not exist"""
+        if v not in self.successors[u]:
+            return False
+        self.successors[u].discard(v)
+        self.out_degrees[u] -= 1
+        self.in_degrees[v] -= 1
+
+        if self.labels[u] == self.labels[v]:
+            if u != v:
+                self._split_component(self.labels[u])
+                self._rebuild_reachability()
+        else:
+            key = (self.labels[u], self.labels[v])
+            self._cross_edges[key] -= 1
+            if not self._cross_edges[key]:
+                del self._cross_edges[key]
+            # If u's component still reaches v through another exit edge, no
+            # reachability changes anywhere; vertices outside the component
+            # cannot route back through u → v
+            label_u = self.labels[u]
+            still_reaches = any(self.labels[w] != label_u and self.reach[w] >> v & 1
+                                for x in range(self.n) if self.labels[x] == label_u
+                                for w in self.successors[x])
+            if not still_reaches:
+                self._rebuild_reachability()
+
+        self._verify()
+        return True
+
+    def check_consistency(self):
+        """Compare the incremental state against the batch functions; returns mismatches"""
+        matrix = self.matrix
+        components = find_strongly_connected_components(matrix)
+        mismatches = []
+        if self.degrees != calculate_degrees(matrix, is_directed=True):
+            mismatches.append('degrees')
+        if self.reachability_matrix() != transitive_closure(matrix):
+            mismatches.append('reachability')
+        if self.components != components:
+            mismatches.append('components')
+        if self.condensation != create_condensation_graph(matrix, components):
+            mismatches.append('condensation')
+        return mismatches
+
+    def _verify(self):
+        if self.check:
+            mismatches = self.check_consistency()
+            if mismatches:
+                raise RuntimeError(f"Incremental analysis out of sync: {', '.join(mismatches)}")
+
+    def _rebuild_components(self):
+        adjacency = [sorted(neighbours) for neighbours in self.successors]
+        self.labels = tarjan_scc_labels(adjacency)
+        self._next_label = max(self.labels) + 1 if self.labels else 0
+        self._rebuild_cross_edges()
+
+    def _split_component(self, label):
+        """Re-run Tarjan on the members of one component after an inner edge was removed"""
+        members = [x for x in range(self.n) if self.labels[x] == label]
+        local = {vertex: i for i, vertex in enumerate(members)}
+        adjacency = [[local[j] for j in self.successors[vertex] if j in local] for vertex in members]
+        local_labels = tarjan_scc_labels(adjacency)
+        if max(local_labels) == 0:
+            return
+        for vertex, local_label in zip(members, local_labels):
+            self.labels[vertex] = self._next_label + local_label
+        self._next_label += max(local_labels) + 1
+        self._rebuild_cross_edges()
+
+    def _rebuild_cross_edges(self):
+        self._cross_edges = {}
+        for u, neighbours in enumerate(self.successors):
+            for v in neighbours:
+                if self.labels[u] != self.labels[v]:
+                    key = (self.labels[u], self.labels[v])
+                    self._cross_edges[key] = self._cross_edges.get(key, 0) + 1
+
+    def _rebuild_reachability(self):
+        self.reach = transitive_closure_condensed(CSRGraph.from_adjacency(self.successors))
\ No newline at end of file
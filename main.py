@@ -2,17 +2,29 @@
 Main Application Module
 Handles GUI, user interaction, and coordinates all other modules
 """
+import argparse
+import io
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 
-from graph_generator import generate_Adir, make_Aundir, matrix_power, calculate_grid_size
-from graph_analyzer import calculate_degrees, is_regular_graph, find_special_vertices, format_paths_compact
-from graph_algorithms import (find_paths_of_length, transitive_closure, strong_connectivity_matrix,
-                             find_strongly_connected_components, create_condensation_graph)
+from analysis_cache import clear_cache
+from graph_generator import generate_Adir, make_Aundir_packed, matrix_power, calculate_grid_size
+from graph_analyzer import calculate_degrees, degree_summary, format_paths_compact
+from graph_algorithms import (iter_paths_of_length, strong_connectivity_matrix,
+                             find_strongly_connected_components, condensation_dag)
 from graph_visualizer import GraphVisualizer
+from graph_io import load_graph
+from sparse_graph import CSRGraph
+from reachability import reachability_index
+import profiler
+from matrix_viewer import MatrixViewer
+from config import (LOD_EDGE_THRESHOLD, FORCE_LAYOUT_MIN_VERTICES, FORCE_LAYOUT_TIME_BUDGET,
+                    MATRIX_TEXT_MAX_SIZE)
 
 class GraphAnalyzer:
-    def __init__(self, root):
+    def __init__(self, root, graph_files=()):
         self.root = root
         
         # Input parameters
@@ -24,17 +36,30 @@ class GraphAnalyzer:
         self.k1 = 1.0 - self.n3 * 0.01 - self.n4 * 0.01 - 0.3  # For first part
         self.k2 = 1.0 - self.n3 * 0.005 - self.n4 * 0.005 - 0.27  # For second part
         
+        if graph_files:
+            # Open saved graphs instead of generating; a single file serves both parts
+            self.Adir1 = _load_matrix(graph_files[0])
+            self.Adir2 = _load_matrix(graph_files[-1])
+            if len(self.Adir1) != len(self.Adir2):
+                raise ValueError("Both graph files must have the same number of vertices")
+            self.n = len(self.Adir1)
+        else:
+            # Generate matrices
+            self.Adir1 = generate_Adir(self.n, self.k1, self.seed)
+            self.Adir2 = generate_Adir(self.n, self.k2, self.seed)
+        self.Aundir1 = make_Aundir_packed(self.Adir1)  # upper-triangular packed storage
+        
         # Dynamic grid size calculation
         self.rows, self.cols = calculate_grid_size(self.n)
         
-        # Generate matrices
-        self.Adir1 = generate_Adir(self.n, self.k1, self.seed)
-        self.Aundir1 = make_Aundir(self.Adir1)
-        self.Adir2 = generate_Adir(self.n, self.k2, self.seed)
-        
         self.current_matrix = self.Adir1
         self.current_type = "directed1"
         
+        # Background analysis state
+        self.analysis_thread = None
+        self.analysis_cancel = None
+        self.analysis_queue = None
+        
         self.setup_ui()
         self.setup_visualizer()
         self.analyze_graphs()
@@ -64,6 +89,16 @@ class GraphAnalyzer:
         right_frame = tk.Frame(main_frame)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(10, 0))
         
+        # Analysis progress and cancel button
+        status_frame = tk.Frame(right_frame)
+        status_frame.pack(fill=tk.X, pady=(0, 5))
+        self.progress = ttk.Progressbar(status_frame, mode="determinate", length=200)
+        self.progress.pack(side=tk.LEFT, padx=(0, 5))
+        self.status_label = tk.Label(status_frame, text="", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.cancel_button = tk.Button(status_frame, text="Cancel", state=tk.DISABLED, command=self.cancel_analysis)
+        self.cancel_button.pack(side=tk.RIGHT)
+        
         # Notebook for different result tabs
         self.notebook = ttk.Notebook(right_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -74,7 +109,15 @@ class GraphAnalyzer:
     def setup_visualizer(self):
         """Initialize the graph visualizer"""
         self.visualizer = GraphVisualizer(self.canvas)
-        self.visualizer.calculate_positions(self.n, self.rows, self.cols)
+        if self.n >= FORCE_LAYOUT_MIN_VERTICES:
+            # A grid routes most edges of a large graph through other vertices
+            self.visualizer.calculate_force_positions(self.Adir1, time_budget=FORCE_LAYOUT_TIME_BUDGET)
+        else:
+            self.visualizer.calculate_positions(self.n, self.rows, self.cols)
+        self.grid_positions = self.visualizer.positions
+        
+        # Canvas items per graph type, reused across graph switches (see draw_graph)
+        self.rendered_graphs = {}
         
     def create_results_tabs(self):
         # Tab 1: Basic Analysis
@@ -94,6 +137,48 @@ class GraphAnalyzer:
         self.notebook.add(tab3, text="Matrices")
         self.results_text3 = scrolledtext.ScrolledText(tab3, wrap=tk.WORD, width=60, height=30, font=("Consolas", 9))
         self.results_text3.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Matrices larger than MATRIX_TEXT_MAX_SIZE; packed once the first one arrives
+        self.matrix_viewer = MatrixViewer(tab3)
+        
+        # Tab 4: Profile (filled from profiler when profiling is enabled)
+        tab4 = ttk.Frame(self.notebook)
+        self.notebook.add(tab4, text="Profile")
+        profile_buttons = tk.Frame(tab4)
+        profile_buttons.pack(fill=tk.X, padx=5, pady=(5, 0))
+        self.profiling_enabled = tk.BooleanVar(value=profiler.is_enabled())
+        tk.Checkbutton(profile_buttons, text="Профілювання", variable=self.profiling_enabled,
+                       command=self.toggle_profiling).pack(side=tk.LEFT)
+        tk.Button(profile_buttons, text="Оновити", command=self.show_profile).pack(side=tk.LEFT, padx=5)
+        tk.Button(profile_buttons, text="Скинути", command=self.reset_profile).pack(side=tk.LEFT)
+        tk.Button(profile_buttons, text="Перезапустити аналіз",
+                  command=self.rerun_analysis).pack(side=tk.LEFT, padx=5)
+        self.results_text4 = scrolledtext.ScrolledText(tab4, wrap=tk.NONE, width=60, height=30, font=("Consolas", 9))
+        self.results_text4.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.show_profile()
+    
+    def toggle_profiling(self):
+        if self.profiling_enabled.get():
+            profiler.enable()
+        else:
+            profiler.disable()
+        self.show_profile()
+    
+    def reset_profile(self):
+        profiler.reset()
+        self.show_profile()
+    
+    def rerun_analysis(self):
+        """Run the analysis again from scratch, so the profile shows computation rather than cache hits"""
+        clear_cache()
+        self.analyze_graphs()
+    
+    def show_profile(self):
+        """Show the profiler table; times include nested calls and cache hits"""
+        text = profiler.format_report()
+        if not profiler.is_enabled():
+            text = "Профілювання вимкнене (увімкніть прапорець і натисніть «Перезапустити аналіз»)\n\n" + text
+        self.results_text4.delete(1.0, tk.END)
+        self.results_text4.insert(tk.END, text)
     
     def switch_graph(self, graph_type):
         self.current_type = graph_type
@@ -104,213 +189,325 @@ class GraphAnalyzer:
         elif graph_type == "directed2":
             self.current_matrix = self.Adir2
         elif graph_type == "condensation":
-            components = find_strongly_connected_components(self.Adir2)
-            self.current_matrix = create_condensation_graph(self.Adir2, components)
+            # Sparse DAG edges, cached together with the SCCs
+            self.current_matrix = condensation_dag(self.Adir2).graph
             
         self.draw_graph()
     
     def draw_graph(self):
-        self.visualizer.clear_canvas()
+        """Show the current graph, reusing canvas items drawn for it earlier
+        
+        Every graph keeps its own items under a "graph:<type>" tag. Switching
+        hides the other graphs and redraws only edges that changed since the
+        graph was last shown.
+        """
         matrix = self.current_matrix
+        graph_tag = f"graph:{self.current_type}"
+        node_tag = f"nodes:{self.current_type}"
+        self.visualizer.set_visible("graph", False)
         
         # Adjust positions for condensation graph
         if self.current_type == "condensation":
-            components = find_strongly_connected_components(self.Adir2)
-            positions = self.visualizer.get_condensation_positions(len(components))
-            node_labels = [f"C{i}" for i in range(len(components))]
-            self.visualizer.positions = positions  # Update visualizer positions
+            num_components = len(condensation_dag(self.Adir2))
+            positions = self.visualizer.get_condensation_positions(num_components)
+            node_labels = [f"C{i}" for i in range(num_components)]
         else:
-            positions = self.visualizer.positions
+            positions = self.grid_positions
             node_labels = [str(i) for i in range(self.n)]
+        self.visualizer.positions = positions  # Update visualizer positions
         
-        # SMART EDGE DRAWING WITH COLLISION AVOIDANCE
         if self.current_type == "undirected1":
-            # For undirected graphs: process only upper triangle to avoid duplicates
-            for i in range(len(matrix)):
-                if i >= len(positions):
-                    break
-                for j in range(i, len(matrix)):  # Start from i, not 0
-                    if j >= len(positions):
-                        break
-                    if matrix[i][j] == 1:
-                        x1, y1 = positions[i]
-                        x2, y2 = positions[j]
-                        
-                        if i == j:
-                            # Self-loop
-                            self.visualizer.draw_self_loop(x1, y1, with_arrow=False)
-                        else:
-                            # Smart routing for undirected edge
-                            self.visualizer.draw_smart_line((x1, y1), (x2, y2), with_arrow=False)
+            # For undirected graphs: packed storage holds only the upper triangle, no duplicates
+            edges = {(i, j) for i, j in matrix.edges() if j < len(positions)}
+        elif isinstance(matrix, CSRGraph):
+            edges = {(i, j) for i, j in matrix.edges() if i < len(positions) and j < len(positions)}
         else:
-            # For directed graphs: process all edges normally with smart routing
-            for i in range(len(matrix)):
-                if i >= len(positions):
+            edges = {(i, j) for i in range(min(len(matrix), len(positions)))
+                     for j, value in enumerate(matrix[i]) if value == 1 and j < len(positions)}
+        
+        # Level of detail: no routing, curves or arrows for very large graphs
+        simple = len(edges) > LOD_EDGE_THRESHOLD
+        
+        rendered = self.rendered_graphs.get(self.current_type)
+        if rendered is None or rendered['positions'] != positions or rendered['simple'] != simple:
+            self.canvas.delete(graph_tag)
+            rendered = {'positions': positions, 'simple': simple, 'edges': {}}
+            self.rendered_graphs[self.current_type] = rendered
+            # Draw nodes once; edges are kept below them with tag_raise
+            for i, (x, y) in enumerate(positions):
+                if i >= len(node_labels):
                     break
-                x1, y1 = positions[i]
-                for j in range(len(matrix)):
-                    if j >= len(positions):
-                        break
-                    if matrix[i][j] == 1:
-                        x2, y2 = positions[j]
-                        
-                        if i == j:
-                            # Self-loop with arrow
-                            self.visualizer.draw_self_loop(x1, y1, with_arrow=True)
-                        else:
-                            # Smart routing for directed edge with arrow
-                            self.visualizer.draw_smart_line((x1, y1), (x2, y2), with_arrow=True)
+                self.visualizer.draw_node(x, y, node_labels[i], tags=("graph", graph_tag, node_tag))
+        
+        # Remove edges that no longer exist
+        for edge in rendered['edges'].keys() - edges:
+            for item in rendered['edges'].pop(edge):
+                self.canvas.delete(item)
+        
+        # SMART EDGE DRAWING WITH COLLISION AVOIDANCE (new edges only)
+        with_arrow = self.current_type != "undirected1"
+        for i, j in sorted(edges - rendered['edges'].keys()):
+            x1, y1 = positions[i]
+            x2, y2 = positions[j]
+            tags = ("graph", graph_tag)
+            if i == j:
+                items = [] if simple else self.visualizer.draw_self_loop(x1, y1, with_arrow=with_arrow, tags=tags)
+            else:
+                items = self.visualizer.draw_smart_line((x1, y1), (x2, y2), with_arrow=with_arrow,
+                                                        tags=tags, simple=simple)
+            rendered['edges'][(i, j)] = items
         
         # Draw nodes on top of edges
-        for i, (x, y) in enumerate(positions):
-            if i >= len(node_labels):
-                break
-            self.visualizer.draw_node(x, y, node_labels[i])
+        self.canvas.tag_raise(node_tag)
+        self.visualizer.set_visible(graph_tag, True)
     
     def analyze_graphs(self):
+        """Start the analysis pipeline in a background thread"""
+        self.cancel_analysis()
+        
         # Clear all result areas
         self.results_text1.delete(1.0, tk.END)
         self.results_text2.delete(1.0, tk.END)
         self.results_text3.delete(1.0, tk.END)
+        self.matrix_viewer.clear()
+        self.matrix_viewer.pack_forget()
         
-        # Part 1 Analysis
-        self.results_text1.insert(tk.END, f"ЛАБОРАТОРНА РОБОТА 4 - АНАЛІЗ ГРАФІВ\n")
-        self.results_text1.insert(tk.END, f"Параметри: n1={self.n1}, n2={self.n2}, n3={self.n3}, n4={self.n4}\n")
-        self.results_text1.insert(tk.END, f"Вершини: {self.n}\n")
-        self.results_text1.insert(tk.END, f"k1 = {self.k1:.3f}, k2 = {self.k2:.3f}\n\n")
+        # Draw initial graph
+        self.draw_graph()
         
-        # Analyze first graph (k1)
-        self.results_text1.insert(tk.END, "=== ЧАСТИНА 1: БАЗОВИЙ АНАЛІЗ (k1) ===\n\n")
+        self.analysis_cancel = threading.Event()
+        self.analysis_queue = queue.Queue()
+        self.progress.configure(value=0, maximum=ANALYSIS_SECTIONS)
+        self.status_label.configure(text="Аналіз...")
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.analysis_thread = threading.Thread(
+            target=self._run_analysis, args=(self.analysis_cancel, self.analysis_queue), daemon=True)
+        self.analysis_thread.start()
+        self.root.after(ANALYSIS_POLL_MS, self._poll_analysis, self.analysis_queue)
+    
+    def cancel_analysis(self):
+        """Ask the running analysis (if any) to stop at the next checkpoint"""
+        if self.analysis_cancel is not None:
+            self.analysis_cancel.set()
+    
+    def _run_analysis(self, cancel, results):
+        """Worker thread: compute sections and post them to the UI queue
+        
+        Text sections are collected per tab in one buffer and posted as a
+        single insert when the next tab starts (or the run ends); progress
+        is still reported per section.
+        """
+        tab_widget, tab_text = None, io.StringIO()
+        status = ('done', None, None)
+        try:
+            for widget, content in self._analysis_sections(cancel):
+                if cancel.is_set():
+                    raise AnalysisCancelled()
+                if widget is self.matrix_viewer:
+                    results.put(('matrix', widget, content))
+                else:
+                    if widget is not tab_widget and tab_widget is not None:
+                        results.put(('text', tab_widget, tab_text.getvalue()))
+                        tab_text = io.StringIO()
+                    tab_widget = widget
+                    tab_text.write(content)
+                results.put(('progress', None, None))
+        except AnalysisCancelled:
+            status = ('cancelled', None, None)
+        except Exception as error:
+            status = ('error', None, f"{type(error).__name__}: {error}")
+        if tab_widget is not None:
+            results.put(('text', tab_widget, tab_text.getvalue()))
+        results.put(status)
+    
+    def _poll_analysis(self, results):
+        """UI thread: insert finished sections and update progress"""
+        if results is not self.analysis_queue:
+            return  # superseded by a newer analysis run
+        
+        while True:
+            try:
+                kind, widget, text = results.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'progress':
+                self.progress.step(1)
+                continue
+            if kind == 'text':
+                widget.insert(tk.END, text)
+                continue
+            if kind == 'matrix':
+                if not widget.winfo_ismapped():
+                    widget.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, padx=5, pady=5,
+                                before=self.results_text3)
+                widget.add_matrix(*text)
+                continue
+            
+            self.cancel_button.configure(state=tk.DISABLED)
+            if kind == 'done':
+                self.progress.configure(value=ANALYSIS_SECTIONS)
+                self.status_label.configure(text="Аналіз завершено")
+            elif kind == 'cancelled':
+                self.status_label.configure(text="Аналіз скасовано")
+            else:
+                self.status_label.configure(text=f"Помилка аналізу: {text}")
+            if profiler.is_enabled():
+                self.show_profile()
+            return
+        
+        self.root.after(ANALYSIS_POLL_MS, self._poll_analysis, results)
+    
+    def _analysis_sections(self, cancel):
+        """Yield (text widget, text) pairs in display order; runs off the UI thread"""
+        # Part 1 Analysis
+        yield self.results_text1, (
+            f"ЛАБОРАТОРНА РОБОТА 4 - АНАЛІЗ ГРАФІВ\n"
+            f"Параметри: n1={self.n1}, n2={self.n2}, n3={self.n3}, n4={self.n4}\n"
+            f"Вершини: {self.n}\n"
+            f"k1 = {self.k1:.3f}, k2 = {self.k2:.3f}\n\n"
+            "=== ЧАСТИНА 1: БАЗОВИЙ АНАЛІЗ (k1) ===\n\n")
         
         # Directed graph degrees
-        dir_degrees = calculate_degrees(self.Adir1, is_directed=True)
-        self.results_text1.insert(tk.END, "Аналіз напрямленого графа:\n")
-        self.results_text1.insert(tk.END, f"Напівстепені заходу:  {dir_degrees['in_degrees']}\n")
-        self.results_text1.insert(tk.END, f"Напівстепені виходу: {dir_degrees['out_degrees']}\n")
-        self.results_text1.insert(tk.END, f"Повні степені:       {dir_degrees['total_degrees']}\n\n")
+        dir_degrees = degree_summary(self.Adir1, is_directed=True)
+        yield self.results_text1, (
+            "Аналіз напрямленого графа:\n"
+            f"Напівстепені заходу:  {dir_degrees['in_degrees']}\n"
+            f"Напівстепені виходу: {dir_degrees['out_degrees']}\n"
+            f"Повні степені:       {dir_degrees['total_degrees']}\n\n")
         
         # Undirected graph degrees
-        undir_degrees = calculate_degrees(self.Aundir1, is_directed=False)
-        self.results_text1.insert(tk.END, "Аналіз ненапрямленого графа:\n")
-        self.results_text1.insert(tk.END, f"Степені вершин: {undir_degrees['degrees']}\n\n")
+        undir_degrees = degree_summary(self.Aundir1, is_directed=False)
+        yield self.results_text1, (
+            "Аналіз ненапрямленого графа:\n"
+            f"Степені вершин: {undir_degrees['degrees']}\n\n")
         
-        # Check regularity
-        is_reg_dir, reg_deg_dir = is_regular_graph(dir_degrees['total_degrees'])
-        is_reg_undir, reg_deg_undir = is_regular_graph(undir_degrees['degrees'])
+        # Check regularity (computed together with the degrees)
+        is_reg_dir, reg_deg_dir = dir_degrees['regular'], dir_degrees['regular_degree']
+        is_reg_undir, reg_deg_undir = undir_degrees['regular'], undir_degrees['regular_degree']
         
-        self.results_text1.insert(tk.END, f"Напрямлений граф регулярний: {is_reg_dir}")
+        text = f"Напрямлений граф регулярний: {is_reg_dir}"
         if is_reg_dir:
-            self.results_text1.insert(tk.END, f" (степінь {reg_deg_dir})")
-        self.results_text1.insert(tk.END, f"\n")
-        
-        self.results_text1.insert(tk.END, f"Ненапрямлений граф регулярний: {is_reg_undir}")
+            text += f" (степінь {reg_deg_dir})"
+        text += f"\nНенапрямлений граф регулярний: {is_reg_undir}"
         if is_reg_undir:
-            self.results_text1.insert(tk.END, f" (степінь {reg_deg_undir})")
-        self.results_text1.insert(tk.END, f"\n\n")
+            text += f" (степінь {reg_deg_undir})"
+        yield self.results_text1, text + "\n\n"
         
         # Special vertices
-        special_dir = find_special_vertices(dir_degrees['total_degrees'])
-        special_undir = find_special_vertices(undir_degrees['degrees'])
-        
-        self.results_text1.insert(tk.END, f"Напрямлений граф:\n")
-        self.results_text1.insert(tk.END, f"  Висячі вершини:    {special_dir['hanging'] if special_dir['hanging'] else 'Немає'}\n")
-        self.results_text1.insert(tk.END, f"  Ізольовані вершини: {special_dir['isolated'] if special_dir['isolated'] else 'Немає'}\n\n")
-        
-        self.results_text1.insert(tk.END, f"Ненапрямлений граф:\n")
-        self.results_text1.insert(tk.END, f"  Висячі вершини:    {special_undir['hanging'] if special_undir['hanging'] else 'Немає'}\n")
-        self.results_text1.insert(tk.END, f"  Ізольовані вершини: {special_undir['isolated'] if special_undir['isolated'] else 'Немає'}\n\n")
+        yield self.results_text1, (
+            "Напрямлений граф:\n"
+            f"  Висячі вершини:    {dir_degrees['hanging'] if dir_degrees['hanging'] else 'Немає'}\n"
+            f"  Ізольовані вершини: {dir_degrees['isolated'] if dir_degrees['isolated'] else 'Немає'}\n\n"
+            "Ненапрямлений граф:\n"
+            f"  Висячі вершини:    {undir_degrees['hanging'] if undir_degrees['hanging'] else 'Немає'}\n"
+            f"  Ізольовані вершини: {undir_degrees['isolated'] if undir_degrees['isolated'] else 'Немає'}\n\n")
         
         # Part 2 Analysis
-        self.results_text2.insert(tk.END, "=== ЧАСТИНА 2: РОЗШИРЕНИЙ АНАЛІЗ (k2) ===\n\n")
-        
         # Semi-degrees for new graph
         dir_degrees2 = calculate_degrees(self.Adir2, is_directed=True)
-        self.results_text2.insert(tk.END, "Новий напрямлений граф (k2) - напівстепені:\n")
-        self.results_text2.insert(tk.END, f"Напівстепені заходу:  {dir_degrees2['in_degrees']}\n")
-        self.results_text2.insert(tk.END, f"Напівстепені виходу: {dir_degrees2['out_degrees']}\n\n")
+        yield self.results_text2, (
+            "=== ЧАСТИНА 2: РОЗШИРЕНИЙ АНАЛІЗ (k2) ===\n\n"
+            "Новий напрямлений граф (k2) - напівстепені:\n"
+            f"Напівстепені заходу:  {dir_degrees2['in_degrees']}\n"
+            f"Напівстепені виходу: {dir_degrees2['out_degrees']}\n\n")
         
         # Paths of length 2 and 3 with compact formatting
-        self.results_text2.insert(tk.END, "Шляхи довжини 2:\n")
-        paths_2 = find_paths_of_length(self.Adir2, 2)
-        compact_paths_2 = format_paths_compact(paths_2, 5)  # type: ignore # 5 paths per line
-        self.results_text2.insert(tk.END, compact_paths_2)
-        self.results_text2.insert(tk.END, "\n")
-        
-        self.results_text2.insert(tk.END, "Шляхи довжини 3:\n")
-        paths_3 = find_paths_of_length(self.Adir2, 3)
-        compact_paths_3 = format_paths_compact(paths_3, 4)  # type: ignore # 4 paths per line (longer paths)
-        self.results_text2.insert(tk.END, compact_paths_3)
-        self.results_text2.insert(tk.END, "\n")
+        paths_2 = _cancellable(iter_paths_of_length(self.Adir2, 2, by_end=True), cancel)
+        compact_paths_2 = format_paths_compact(paths_2, 5)  # 5 paths per line
+        yield self.results_text2, "Шляхи довжини 2:\n" + compact_paths_2 + "\n"
+        
+        paths_3 = _cancellable(iter_paths_of_length(self.Adir2, 3, by_end=True), cancel)
+        compact_paths_3 = format_paths_compact(paths_3, 4)  # 4 paths per line (longer paths)
+        yield self.results_text2, "Шляхи довжини 3:\n" + compact_paths_3 + "\n"
         
         # Strongly connected components
         components = find_strongly_connected_components(self.Adir2)
-        self.results_text2.insert(tk.END, "Компоненти сильної зв'язності:\n")
+        text = io.StringIO()
+        text.write("Компоненти сильної зв'язності:\n")
         for i, comp in enumerate(components):
-            self.results_text2.insert(tk.END, f"  Компонента {i}: {comp}\n")
-        self.results_text2.insert(tk.END, f"\nЗагальна кількість компонент: {len(components)}\n\n")
+            text.write(f"  Компонента {i}: {comp}\n")
+        text.write(f"\nЗагальна кількість компонент: {len(components)}\n\n")
+        yield self.results_text2, text.getvalue()
         
         # Matrices
-        self.results_text3.insert(tk.END, "=== МАТРИЦІ ===\n\n")
+        yield self.results_text3, "=== МАТРИЦІ ===\n\n"
         
         # Original matrices
-        self.results_text3.insert(tk.END, "Матриця суміжності напрямленого графа (k1):\n")
-        for row in self.Adir1:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
-        
-        self.results_text3.insert(tk.END, "Матриця суміжності ненапрямленого графа (k1):\n")
-        for row in self.Aundir1:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
-        
-        self.results_text3.insert(tk.END, "Матриця суміжності напрямленого графа (k2):\n")
-        for row in self.Adir2:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
+        yield self._matrix_section("Матриця суміжності напрямленого графа (k1):", self.Adir1)
+        yield self._matrix_section("Матриця суміжності ненапрямленого графа (k1):", self.Aundir1)
+        yield self._matrix_section("Матриця суміжності напрямленого графа (k2):", self.Adir2)
         
         # A^2 and A^3 matrices
         A2 = matrix_power(self.Adir2, 2)
+        yield self._matrix_section("Матриця A² (шляхи довжини 2):", A2)
         A3 = matrix_power(self.Adir2, 3)
+        yield self._matrix_section("Матриця A³ (шляхи довжини 3):", A3)
         
-        self.results_text3.insert(tk.END, "Матриця A² (шляхи довжини 2):\n")
-        for row in A2:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
-        
-        self.results_text3.insert(tk.END, "Матриця A³ (шляхи довжини 3):\n")
-        for row in A3:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
-        
-        # Reachability matrix
-        reachability = transitive_closure(self.Adir2)
-        self.results_text3.insert(tk.END, "Матриця досяжності:\n")
-        for row in reachability:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
+        # Reachability matrix: rows are read from the index, no n×n closure is stored
+        reachability = reachability_index(self.Adir2)
+        yield self._matrix_section("Матриця досяжності:", reachability)
         
         # Strong connectivity matrix
         strong_conn = strong_connectivity_matrix(self.Adir2)
-        self.results_text3.insert(tk.END, "Матриця сильної зв'язності:\n")
-        for row in strong_conn:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        self.results_text3.insert(tk.END, "\n")
+        yield self._matrix_section("Матриця сильної зв'язності:", strong_conn)
         
         # Condensation matrix
-        condensation = create_condensation_graph(self.Adir2, components)
-        self.results_text3.insert(tk.END, "Матриця графа конденсації:\n")
-        for row in condensation:
-            self.results_text3.insert(tk.END, f"{row}\n")
-        
-        # Draw initial graph
-        self.draw_graph()
+        condensation = condensation_dag(self.Adir2).to_matrix()
+        yield self._matrix_section("Матриця графа конденсації:", condensation, last=True)
+    
+    def _matrix_section(self, title, matrix, last=False):
+        """Small matrices are printed in the Matrices tab, large ones go to the paged viewer"""
+        if len(matrix) > MATRIX_TEXT_MAX_SIZE:
+            return self.matrix_viewer, (title, matrix)
+        text = _format_matrix(title, matrix)
+        return self.results_text3, text.rstrip("\n") + "\n" if last else text
+
+class AnalysisCancelled(Exception):
+    """Raised inside the analysis thread when the user presses Cancel"""
 
-def main():
+# Number of sections yielded by GraphAnalyzer._analysis_sections (progress bar maximum)
+ANALYSIS_SECTIONS = 18
+ANALYSIS_POLL_MS = 50
+
+def _cancellable(items, cancel, check_every=1000):
+    """Pass items through, raising AnalysisCancelled once cancel is set"""
+    for count, item in enumerate(items):
+        if count % check_every == 0 and cancel.is_set():
+            raise AnalysisCancelled()
+        yield item
+
+def _format_matrix(title, matrix):
+    text = io.StringIO()
+    text.write(title + "\n")
+    for row in matrix:
+        text.write(f"{row}\n")
+    text.write("\n")
+    return text.getvalue()
+
+def _load_matrix(path):
+    """Dense matrix from a graph file; stored SCC/closure results are put in the analysis cache"""
+    with load_graph(path) as graph_file:
+        matrix = graph_file.graph.to_matrix()
+        graph_file.prime_cache(matrix)
+    return matrix
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Лабораторна робота 4 - Аналіз графів")
+    parser.add_argument('graph_files', nargs='*', metavar='FILE',
+                        help='saved graph files (graph_io) for part 1 and part 2 instead of generated graphs')
+    parser.add_argument('--profile', action='store_true', help='record timings from startup (see the Profile tab)')
+    args = parser.parse_args(argv)
+    if len(args.graph_files) > 2:
+        parser.error("at most two graph files")
+    if args.profile:
+        profiler.enable()
+    
     root = tk.Tk()
     root.title("Лабораторна робота 4 - Аналіз графів")
     root.geometry("1400x800")
     
-    app = GraphAnalyzer(root)
+    app = GraphAnalyzer(root, args.graph_files)
     root.mainloop()
 
 if __name__ == "__main__":
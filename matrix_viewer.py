@@ -0,0 +1,127 @@
+﻿"""
+Matrix Viewer Module
+Paged view of large matrices: only the visible window of rows and columns is formatted
+"""
+import tkinter as tk
+from tkinter import ttk
+
+class MatrixViewer(tk.Frame):
+    """Text view over a list of (title, matrix) pairs with a scrollable cell window
+
+    Matrices may be anything indexable as matrix[i][j] with len(matrix) rows
+    (lists, PackedUndirected, NumPy arrays). Scrolling re-formats only the
+    rows × columns window on screen, so the widget stays small for any n.
+    """
+
+    def __init__(self, parent, rows: int = 20, columns: int = 24, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.matrices = []
+        self.current = None
+        self.visible_rows = rows
+        self.visible_columns = columns
+        self.row_offset = 0
+        self.column_offset = 0
+
+        header = tk.Frame(self)
+        header.pack(fill=tk.X)
+        self.selector = ttk.Combobox(header, state="readonly", width=45)
+        self.selector.pack(side=tk.LEFT, padx=(0, 5))
+        self.selector.bind("<<ComboboxSelected>>", lambda event: self.show(self.selector.current()))
+        self.position_label = tk.Label(header, anchor=tk.W)
+        self.position_label.pack(side=tk.LEFT, fill=tk.X)
+
+        body = tk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.vertical = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._scroll_rows)
+        self.vertical.pack(side=tk.RIGHT, fill=tk.Y)
+        self.horizontal = ttk.Scrollbar(body, orient=tk.HORIZONTAL, command=self._scroll_columns)
+        self.horizontal.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text = tk.Text(body, wrap=tk.NONE, width=60, height=rows + 1, font=("Consolas", 9))
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.configure(state=tk.DISABLED)
+
+        self.text.bind("<MouseWheel>", self._on_wheel)
+        self.text.bind("<Shift-MouseWheel>", self._on_wheel)
+        self.text.bind("<Button-4>", lambda event: self._scroll_rows("scroll", -3, "units"))
+        self.text.bind("<Button-5>", lambda event: self._scroll_rows("scroll", 3, "units"))
+
+    def add_matrix(self, title: str, matrix):
+        """Add a matrix to the selector; the first one added is shown"""
+        self.matrices.append((title, matrix))
+        self.selector.configure(values=[f"{title} ({len(m)}×{len(m)})" for title, m in self.matrices])
+        if self.current is None:
+            self.show(0)
+
+    def clear(self):
+        self.matrices = []
+        self.current = None
+        self.selector.configure(values=[])
+        self.selector.set("")
+        self.position_label.configure(text="")
+        self._set_text("")
+
+    def show(self, index: int):
+        """Show matrix number index from its top-left corner"""
+        self.current = index
+        self.selector.current(index)
+        self.row_offset = self.column_offset = 0
+        self._render()
+
+    def _scroll_rows(self, *args):
+        if self.current is not None:
+            size = len(self.matrices[self.current][1])
+            self.row_offset = _scroll_offset(self.row_offset, size, self.visible_rows, args)
+            self._render()
+
+    def _scroll_columns(self, *args):
+        if self.current is not None:
+            size = len(self.matrices[self.current][1])
+            self.column_offset = _scroll_offset(self.column_offset, size, self.visible_columns, args)
+            self._render()
+
+    def _on_wheel(self, event):
+        step = -3 if event.delta > 0 else 3
+        if event.state & 0x0001:  # Shift scrolls sideways
+            self._scroll_columns("scroll", step, "units")
+        else:
+            self._scroll_rows("scroll", step, "units")
+        return "break"
+
+    def _render(self):
+        """Format only the visible window of the current matrix"""
+        title, matrix = self.matrices[self.current]
+        n = len(matrix)
+        rows = range(self.row_offset, min(n, self.row_offset + self.visible_rows))
+        columns = range(self.column_offset, min(n, self.column_offset + self.visible_columns))
+
+        cells = []
+        for i in rows:
+            row = matrix[i]
+            cells.append([str(row[j]) for j in columns])
+        width = max([len(str(columns[-1]))] + [len(cell) for row in cells for cell in row]) if columns else 1
+        label_width = len(str(max(n - 1, 0)))
+
+        lines = [" " * label_width + " │ " + " ".join(f"{j:>{width}}" for j in columns)]
+        for i, row in zip(rows, cells):
+            lines.append(f"{i:>{label_width}} │ " + " ".join(f"{cell:>{width}}" for cell in row))
+        self._set_text("\n".join(lines))
+
+        if n:
+            self.vertical.set(rows.start / n, rows.stop / n)
+            self.horizontal.set(columns.start / n, columns.stop / n)
+            self.position_label.configure(
+                text=f"Рядки {rows.start}–{rows.stop - 1}, стовпці {columns.start}–{columns.stop - 1} з {n}")
+
+    def _set_text(self, text: str):
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, text)
+        self.text.configure(state=tk.DISABLED)
+
+def _scroll_offset(offset: int, total: int, visible: int, args) -> int:
+    """New first index for a Scrollbar command: ("moveto", fraction) or ("scroll", n, units|pages)"""
+    if args[0] == "moveto":
+        offset = int(float(args[1]) * total)
+    elif args[0] == "scroll":
+        offset += int(args[1]) * (visible if args[2] == "pages" else 1)
+    return max(0, min(offset, total - visible))
\ No newline at end of file
@@ -0,0 +1,157 @@
+﻿"""
+Profiler Module
+Opt-in call counts, timings and allocations for the public analysis and drawing functions
+"""
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+_enabled = False
+_trace_memory = False
+_lock = threading.Lock()
+# name -> [calls, total seconds, max seconds, largest per-call peak bytes]
+_stats = {}
+# Per thread: [memory at entry, highest memory seen] of every running profiled call
+_peaks = threading.local()
+
+def profiled(func):
+    """Record calls of func while profiling is enabled
+
+    Disabled, the wrapper costs one flag check per call. For generator
+    functions the time spent inside the generator is recorded, not just its
+    creation. Outermost on @cached functions, so cache hits count as calls.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    generator = inspect.isgeneratorfunction(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        if generator:
+            return _timed_generator(name, func(*args, **kwargs))
+        memory = _trace_memory and tracemalloc.is_tracing()
+        if memory:
+            _enter_peak()
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _record(name, 1, elapsed, _exit_peak() if memory else 0)
+
+    return wrapper
+
+def _enter_peak():
+    """Start a peak measurement; the peak so far is folded into the enclosing call first
+    
+    tracemalloc has a single peak counter, so every call resets it and keeps
+    its own running maximum on a stack instead.
+    """
+    stack = getattr(_peaks, 'stack', None)
+    if stack is None:
+        stack = _peaks.stack = []
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    stack.append([current, current])
+
+def _exit_peak() -> int:
+    """End the innermost peak measurement: bytes above the memory in use at entry"""
+    stack = _peaks.stack
+    start, highest = stack.pop()
+    highest = max(highest, tracemalloc.get_traced_memory()[1])
+    if stack:
+        stack[-1][1] = max(stack[-1][1], highest)
+    tracemalloc.reset_peak()
+    return highest - start
+
+def _timed_generator(name, iterator):
+    elapsed = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        iterator.close()
+        _record(name, 1, elapsed, 0)
+
+def _record(name, calls, seconds, peak, max_seconds=None):
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = [0, 0.0, 0.0, 0]
+        entry[0] += calls
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds if max_seconds is None else max_seconds)
+        entry[3] = max(entry[3], peak)
+
+def enable(memory: bool = False) -> None:
+    """Start recording; memory=True also traces allocations (much slower)"""
+    global _enabled, _trace_memory
+    _trace_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+def disable() -> None:
+    global _enabled, _trace_memory
+    _enabled = False
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+def report() -> list[dict]:
+    """Recorded functions, slowest cumulative time first"""
+    with _lock:
+        items = [(name, list(entry)) for name, entry in _stats.items()]
+    rows = [{
+        'function': name,
+        'calls': calls,
+        'total_seconds': total,
+        'mean_seconds': total / calls if calls else 0.0,
+        'max_seconds': max_seconds,
+        'peak_bytes': peak,
+    } for name, (calls, total, max_seconds, peak) in items]
+    rows.sort(key=lambda row: row['total_seconds'], reverse=True)
+    return rows
+
+def merge(rows: list[dict]) -> None:
+    """Add a report() from another process into this one"""
+    for row in rows:
+        _record(row['function'], row['calls'], row['total_seconds'], row['peak_bytes'], row['max_seconds'])
+
+def format_report(rows: list[dict] | None = None) -> str:
+    """Plain text table of report(); times include nested profiled calls"""
+    rows = report() if rows is None else rows
+    if not rows:
+        return "Немає даних профілювання\n"
+    lines = [f"{'Функція':<62} {'Викл.':>8} {'Усього, мс':>12} {'Сер., мс':>10} {'Макс., мс':>10} {'Пік, КіБ':>10}"]
+    for row in rows:
+        lines.append(f"{row['function']:<62} {row['calls']:>8} {row['total_seconds'] * 1000:>12.3f} "
+                     f"{row['mean_seconds'] * 1000:>10.3f} {row['max_seconds'] * 1000:>10.3f} "
+                     f"{row['peak_bytes'] / 1024:>10.1f}")
+    return "\n".join(lines) + "\n"
+
+def dump(path, memory_traced: bool | None = None) -> None:
+    """Write report() as JSON (memory_traced defaults to this process's setting)"""
+    traced = _trace_memory if memory_traced is None else memory_traced
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump({'memory_traced': traced, 'functions': report()}, output, indent=2, ensure_ascii=False)
\ No newline at end of file
@@ -0,0 +1,145 @@
+﻿"""
+Reachability Module
+Answers "can u reach v?" from per-component bitsets over the condensation DAG instead of an n×n closure
+"""
+from analysis_cache import cached
+from profiler import profiled
+from graph_algorithms import CondensationDAG, condensation_dag
+from sparse_graph import CSRGraph
+
+class ReachabilityIndex:
+    """Reachability of a directed graph, stored per SCC over the topological order
+
+    Every component keeps one bit per component at or after it in a
+    topological order of the condensation (nothing before it is reachable),
+    as bytes so a query is two list lookups and one byte test. Memory is
+    about C²/16 bytes for C components instead of n² cells; graphs with
+    large SCCs shrink the most. index[u][v] also works, so the index can be
+    shown wherever a matrix is expected; to_matrix() builds the dense
+    closure only on demand.
+    """
+
+    def __init__(self, dag: CondensationDAG):
+        self.n = len(dag.labels)
+        self.labels = dag.labels
+        self.sizes = dag.sizes
+        self.order = dag.order
+        self.position = [0] * len(dag)
+        for rank, label in enumerate(dag.order):
+            self.position[label] = rank
+
+        # Reverse topological order: successors are finished before their predecessors
+        reach = [0] * len(dag)
+        self.rows = [b""] * len(dag)
+        for label in reversed(dag.order):
+            bits = 1 << self.position[label]
+            for successor in dag.graph.neighbors(label):
+                bits |= reach[successor]
+            reach[label] = bits
+            shifted = bits >> self.position[label]
+            self.rows[label] = shifted.to_bytes((shifted.bit_length() + 7) // 8, 'little')
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        return cls(condensation_dag(matrix))
+
+    def reachable(self, u: int, v: int) -> bool:
+        """True when v is reachable from u (every vertex reaches itself)"""
+        source, target = self.labels[u], self.labels[v]
+        offset = self.position[target] - self.position[source]
+        if offset < 0:
+            return False  # v's component comes first in topological order
+        row = self.rows[source]
+        byte = offset >> 3
+        return byte < len(row) and bool(row[byte] >> (offset & 7) & 1)
+
+    def reachable_many(self, pairs) -> list[bool]:
+        """Answer a batch of (u, v) queries"""
+        labels, position, rows = self.labels, self.position, self.rows
+        results = []
+        for u, v in pairs:
+            source = labels[u]
+            offset = position[labels[v]] - position[source]
+            row = rows[source]
+            results.append(0 <= offset and (offset >> 3) < len(row) and bool(row[offset >> 3] >> (offset & 7) & 1))
+        return results
+
+    def component_reach(self, label: int) -> list[int]:
+        """Components reachable from component label (itself included)"""
+        order = self.order
+        start = self.position[label]
+        reached = []
+        for byte_index, byte in enumerate(self.rows[label]):
+            while byte:
+                low = byte & -byte
+                reached.append(order[start + byte_index * 8 + low.bit_length() - 1])
+                byte ^= low
+        return reached
+
+    def reachable_from(self, u: int) -> list[int]:
+        """All vertices reachable from u, ascending"""
+        reached = set(self.component_reach(self.labels[u]))
+        return [v for v, label in enumerate(self.labels) if label in reached]
+
+    def count_pairs(self) -> int:
+        """Number of (u, v) pairs with v reachable from u, diagonal included"""
+        return sum(self.sizes[label] * sum(self.sizes[other] for other in self.component_reach(label))
+                   for label in range(len(self.rows)))
+
+    def to_matrix(self) -> list[list[int]]:
+        """Dense n×n reachability matrix, as returned by transitive_closure"""
+        members = [[] for _ in self.rows]
+        for vertex, label in enumerate(self.labels):
+            members[label].append(vertex)
+        component_rows = []
+        for label in range(len(self.rows)):
+            row = [0] * self.n
+            for other in self.component_reach(label):
+                for vertex in members[other]:
+                    row[vertex] = 1
+            component_rows.append(row)
+        return [component_rows[label][:] for label in self.labels]
+
+    def __len__(self):
+        return self.n
+
+    def copy(self):
+        """Independent copy; rows are immutable bytes and stay shared"""
+        clone = object.__new__(ReachabilityIndex)
+        clone.n = self.n
+        clone.labels, clone.sizes, clone.order = self.labels[:], self.sizes[:], self.order[:]
+        clone.position, clone.rows = self.position[:], self.rows[:]
+        return clone
+
+    def __getitem__(self, u):
+        if not -self.n <= u < self.n:
+            raise IndexError("vertex out of range")
+        return _ReachabilityRow(self, u % self.n)
+
+    def __iter__(self):
+        return (_ReachabilityRow(self, u) for u in range(self.n))
+
+class _ReachabilityRow:
+    """Read-only row u of a ReachabilityIndex, indexable like a matrix row"""
+
+    def __init__(self, index, u):
+        self.index = index
+        self.u = u
+
+    def __len__(self):
+        return self.index.n
+
+    def __getitem__(self, v):
+        return int(self.index.reachable(self.u, v))
+
+    def __iter__(self):
+        return (self[v] for v in range(self.index.n))
+
+    def __repr__(self):
+        return repr(list(self))
+
+@profiled
+@cached
+def reachability_index(matrix: list[list[int]] | CSRGraph) -> ReachabilityIndex:
+    """Build (once per graph) the reachability index over the cached condensation DAG"""
+    return ReachabilityIndex(condensation_dag(matrix))
\ No newline at end of file
@@ -0,0 +1,248 @@
+﻿"""
+Sparse Graph Module
+Compact graph representations: CSR (compressed sparse row) for directed graphs
+and packed upper-triangular storage for undirected graphs
+"""
+from array import array
+from bisect import bisect_left
+from operator import or_
+
+class CSRGraph:
+    """Directed graph stored as CSR arrays: row offsets plus sorted neighbour indices"""
+
+    def __init__(self, n, offsets, indices):
+        self.n = n
+        self.offsets = offsets  # array('q') of length n + 1
+        self.indices = indices  # array('i') of length num_edges, sorted within each row
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """Build CSR arrays from a dense adjacency matrix"""
+        n = len(matrix)
+        offsets = array('q', [0])
+        indices = array('i')
+        for row in matrix:
+            indices.extend(j for j, value in enumerate(row) if value)
+            offsets.append(len(indices))
+        return cls(n, offsets, indices)
+
+    @classmethod
+    def from_adjacency(cls, adjacency):
+        """Build CSR arrays from per-vertex neighbour collections"""
+        offsets = array('q', [0])
+        indices = array('i')
+        for neighbours in adjacency:
+            indices.extend(sorted(neighbours))
+            offsets.append(len(indices))
+        return cls(len(adjacency), offsets, indices)
+
+    @classmethod
+    def from_edges(cls, n, edges):
+        """Build CSR arrays from an iterable of (source, target) pairs"""
+        rows = [[] for _ in range(n)]
+        for i, j in edges:
+            rows[i].append(j)
+        offsets = array('q', [0])
+        indices = array('i')
+        for row in rows:
+            indices.extend(sorted(set(row)))
+            offsets.append(len(indices))
+        return cls(n, offsets, indices)
+
+    def copy(self):
+        return CSRGraph(self.n, array('q', self.offsets), array('i', self.indices))
+
+    def to_matrix(self):
+        """Expand into a dense list-of-lists adjacency matrix"""
+        matrix = [[0] * self.n for _ in range(self.n)]
+        for i in range(self.n):
+            row = matrix[i]
+            for j in self.neighbors(i):
+                row[j] = 1
+        return matrix
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def neighbors(self, v):
+        """Return the out-neighbours of vertex v"""
+        return self.indices[self.offsets[v]:self.offsets[v + 1]]
+
+    def has_edge(self, i, j):
+        """Check whether edge i → j exists"""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        pos = bisect_left(self.indices, j, start, end)
+        return pos < end and self.indices[pos] == j
+
+    def edges(self):
+        """Iterate over all (source, target) pairs"""
+        for i in range(self.n):
+            for j in self.neighbors(i):
+                yield i, j
+
+    def out_degrees(self):
+        offsets = self.offsets
+        return [offsets[i + 1] - offsets[i] for i in range(self.n)]
+
+    def in_degrees(self):
+        in_degrees = [0] * self.n
+        for j in self.indices:
+            in_degrees[j] += 1
+        return in_degrees
+
+    def adjacency_lists(self):
+        """Return plain Python neighbour lists"""
+        return [list(self.neighbors(i)) for i in range(self.n)]
+
+    def transpose(self):
+        """Return the graph with every edge reversed"""
+        counts = self.in_degrees()
+        offsets = array('q', [0]) * (self.n + 1)
+        for j in range(self.n):
+            offsets[j + 1] = offsets[j] + counts[j]
+        fill = array('q', offsets[:-1])
+        indices = array('i', [0]) * len(self.indices)
+        # Sources are visited in ascending order, so every row stays sorted
+        for i in range(self.n):
+            for j in self.neighbors(i):
+                indices[fill[j]] = i
+                fill[j] += 1
+        return CSRGraph(self.n, offsets, indices)
+
+class PackedUndirected:
+    """Undirected graph stored as the upper triangle (diagonal included) in one bytearray
+
+    Cell (i, j) with i <= j lives at i*n - i*(i-1)/2 + (j - i), so the graph
+    takes n(n+1)/2 bytes instead of n² list cells. graph[i][j] works for any
+    order of i and j, so code written for dense matrices can read it directly.
+    """
+
+    def __init__(self, n, data=None):
+        self.n = n
+        self.data = data if data is not None else bytearray(n * (n + 1) // 2)
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """Pack the upper triangle of a symmetric adjacency matrix"""
+        data = bytearray()
+        for i, row in enumerate(matrix):
+            data.extend(1 if value else 0 for value in row[i:])
+        return cls(len(matrix), data)
+
+    @classmethod
+    def from_directed(cls, Adir):
+        """Symmetrize a directed matrix straight into packed form (A | Aᵀ, diagonal kept)"""
+        n = len(Adir)
+        columns = list(zip(*Adir))
+        data = bytearray()
+        for i in range(n):
+            data.extend(map(or_, Adir[i][i:], columns[i][i:]))
+        return cls(n, data)
+
+    def _index(self, i, j):
+        if i > j:
+            i, j = j, i
+        return i * self.n - i * (i - 1) // 2 + (j - i)
+
+    def get(self, i, j):
+        return self.data[self._index(i, j)]
+
+    def set(self, i, j, value):
+        self.data[self._index(i, j)] = 1 if value else 0
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError("row index out of range")
+        return _PackedRow(self, i)
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield _PackedRow(self, i)
+
+    def edges(self):
+        """Iterate over undirected edges as (i, j) with i <= j"""
+        data = self.data
+        start = 0
+        for i in range(self.n):
+            length = self.n - i
+            for offset, value in enumerate(data[start:start + length]):
+                if value:
+                    yield i, i + offset
+            start += length
+
+    def degrees(self):
+        """Vertex degrees with self-loops counted as 2"""
+        degrees = [0] * self.n
+        data = self.data
+        start = 0
+        for i in range(self.n):
+            segment = data[start:start + self.n - i]
+            degrees[i] += segment.count(1) + segment[0]
+            for offset in range(1, len(segment)):
+                if segment[offset]:
+                    degrees[i + offset] += 1
+            start += self.n - i
+        return degrees
+
+    def copy(self):
+        return PackedUndirected(self.n, bytearray(self.data))
+
+    def to_matrix(self):
+        """Expand into a dense symmetric list-of-lists matrix"""
+        return [list(row) for row in self]
+
+class _PackedRow:
+    """Read-only row view of a PackedUndirected graph"""
+
+    def __init__(self, graph, i):
+        self.graph = graph
+        self.i = i
+
+    def __len__(self):
+        return self.graph.n
+
+    def __getitem__(self, j):
+        return self.graph.get(self.i, j)
+
+    def __iter__(self):
+        graph, i = self.graph, self.i
+        # Column part (j < i) is scattered, row part (j >= i) is contiguous
+        for j in range(i):
+            yield graph.data[graph._index(j, i)]
+        start = graph._index(i, i)
+        yield from graph.data[start:start + graph.n - i]
+
+    def __repr__(self):
+        return repr(list(self))
+
+def to_csr(graph) -> CSRGraph:
+    """Return graph as CSRGraph, converting from a dense matrix if needed"""
+    if isinstance(graph, CSRGraph):
+        return graph
+    return CSRGraph.from_matrix(graph)
+
+def to_matrix(graph) -> list[list[int]]:
+    """Return graph as a dense adjacency matrix, converting from CSR or packed form if needed"""
+    if isinstance(graph, (CSRGraph, PackedUndirected)):
+        return graph.to_matrix()
+    return graph
+
+def adjacency_lists(graph) -> list[list[int]]:
+    """Return out-neighbour lists for a dense matrix, CSRGraph or PackedUndirected"""
+    if isinstance(graph, CSRGraph):
+        return graph.adjacency_lists()
+    if isinstance(graph, PackedUndirected):
+        adjacency = [[] for _ in range(graph.n)]
+        for i, j in graph.edges():
+            adjacency[i].append(j)
+            if i != j:
+                adjacency[j].append(i)
+        return [sorted(neighbours) for neighbours in adjacency]
+    return [[j for j, value in enumerate(row) if value] for row in graph]
\ No newline at end of file